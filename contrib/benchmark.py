@@ -7,9 +7,12 @@ Usage:
     python contrib/benchmark.py
     python contrib/benchmark.py -s de -t en -n 5
     python contrib/benchmark.py -e argos -m sentences
+    python contrib/benchmark.py --save throughput.json
 
 Fetches random Wikipedia articles for realistic text samples.
 Use -m sentences to split into sentences (requires nltk).
+Use --save to merge the measured throughput into a stats json that the `auto`
+engine router uses to rank engines (FTM_TRANSLATE_THROUGHPUT_URI).
 
 Requires engines to be installed:
     pip install ftm-translate[argos]
@@ -28,6 +31,7 @@ from enum import StrEnum
 from typing import Optional
 
 import typer
+from anystore.io import smart_read, smart_write
 from rich.console import Console
 
 # Wikipedia API endpoints per language
@@ -225,6 +229,22 @@ def print_results(results: dict, mode: Mode) -> None:
             console.print(f"        [dim]{translated}...[/dim]")
 
 
+def save_throughput(
+    uri: str, results: list[dict], source_lang: str, target_lang: str, mode: Mode
+) -> None:
+    """Merge measured throughput into the stats json used by the engine router."""
+    try:
+        stats = json.loads(smart_read(uri, mode="r"))
+    except FileNotFoundError:
+        stats = {}
+    for res in results:
+        pair = stats.setdefault(res["engine"], {})
+        pair.setdefault(f"{source_lang}-{target_lang}", {})[str(mode)] = round(
+            res["chars_per_sec"], 2
+        )
+    smart_write(uri, json.dumps(stats, indent=2), mode="w")
+
+
 @cli.command()
 def run(
     source: str = typer.Option("de", "-s", "--source", help="Source language"),
@@ -239,6 +259,9 @@ def run(
     engines: Optional[list[str]] = typer.Option(
         None, "-e", "--engine", help="Engines to benchmark (default: both)"
     ),
+    save: Optional[str] = typer.Option(
+        None, "--save", help="Merge throughput into this stats json uri"
+    ),
 ):
     """Benchmark translation engines with random Wikipedia articles."""
     if engines is None:
@@ -288,6 +311,10 @@ def run(
         except Exception as e:
             console.print(f" [red]failed: {e}[/red]")
 
+    if save and all_results:
+        save_throughput(save, all_results, source, target, mode)
+        console.print(f"\nThroughput saved to [bold]{save}[/bold]")
+
     if len(all_results) == 2:
         console.print("\n[bold]Comparison[/bold]")
         a, b = all_results
@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+# flake8: noqa: B008
+"""
+Benchmark of the entity handling in the translation hot path.
+
+Usage:
+    python contrib/hotpath.py
+    python contrib/hotpath.py -n 100000 --text-median 80
+    python contrib/hotpath.py -t en -t fr --batch
+
+Translates synthetic Page fragments (raw dicts, as read from the fragment
+store) with an engine stub that returns its input, so that only the work
+outside of the engine is measured. Two modes are compared:
+
+- `proxy`: a full `EntityProxy` per fragment is carried through translation
+  and a fragment proxy is built from it per target (`make_fragment`), as the
+  worker did before
+- `record`: a lean `TextRecord` per fragment is translated and a proxy is only
+  materialised for the translation fragment per target (`to_proxy`)
+
+With --batch, the entities are translated through the length-bucketed batch
+scheduler (`translate_entities` / `translate_records`) instead of one by one.
+
+Reports throughput, the traced allocation peak and the memory footprint of
+an entity in flight (what the batch scheduler holds while batches fill up)
+of each mode.
+"""
+
+import random
+import time
+import tracemalloc
+from typing import Any, Callable, Iterable
+
+import typer
+from loadtest import make_text
+from rich.console import Console
+from rich.table import Table
+
+cli = typer.Typer(no_args_is_help=False)
+console = Console(stderr=True)
+
+Run = Callable[[list[dict[str, Any]], list[str]], int]
+Make = Callable[[dict[str, Any]], Any]
+
+
+def make_fragments(
+    count: int, text_median: int, text_sigma: float, seed: int
+) -> list[dict[str, Any]]:
+    """Generate synthetic Page fragments"""
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"page-{ix}",
+            "schema": "Page",
+            "properties": {
+                "document": ["doc"],
+                "index": [str(ix)],
+                "bodyText": [make_text(rng, text_median, text_sigma)],
+            },
+        }
+        for ix in range(count)
+    ]
+
+
+def make_fragment(entity: Any) -> Any:
+    """Build the translation fragment proxy from the full translated proxy"""
+    from ftmq.util import make_entity
+
+    from ftm_translate.util import get_lang_prop
+
+    lang_prop = get_lang_prop(entity)
+    data = {
+        "id": entity.id,
+        "schema": entity.schema.name,
+        "caption": entity.caption,
+        "properties": {
+            "translatedText": entity.get("translatedText"),
+            lang_prop: entity.get(lang_prop),
+        },
+    }
+    return make_entity(data, entity.__class__)
+
+
+def run_proxy(fragments: list[dict[str, Any]], targets: list[str]) -> int:
+    from followthemoney.proxy import EntityProxy
+
+    from ftm_translate.logic.base import translate_entity
+
+    written = 0
+    for fragment in fragments:
+        for target in targets:
+            page = EntityProxy.from_dict(fragment)
+            translated = translate_entity(page, "de", target)
+            if translated.has("translatedText"):
+                make_fragment(translated).to_dict()
+                written += 1
+    return written
+
+
+def run_record(fragments: list[dict[str, Any]], targets: list[str]) -> int:
+    from ftm_translate.logic.base import translate_record
+    from ftm_translate.logic.record import TextRecord
+
+    written = 0
+    for fragment in fragments:
+        record = translate_record(TextRecord.from_data(fragment), "de", targets)
+        for target, texts in record.translations.items():
+            if texts:
+                record.to_proxy(target).to_dict()
+                written += 1
+    return written
+
+
+def run_proxy_batch(fragments: list[dict[str, Any]], targets: list[str]) -> int:
+    from followthemoney.proxy import EntityProxy
+
+    from ftm_translate.logic.base import translate_entities
+
+    proxies: Iterable[EntityProxy] = map(EntityProxy.from_dict, fragments)
+    written = 0
+    for translated in translate_entities(proxies, "de", targets):
+        # one fragment per target, as the worker writes them
+        for _ in targets:
+            make_fragment(translated).to_dict()
+            written += 1
+    return written
+
+
+def run_record_batch(fragments: list[dict[str, Any]], targets: list[str]) -> int:
+    from ftm_translate.logic.base import translate_records
+    from ftm_translate.logic.record import TextRecord
+
+    records = map(TextRecord.from_data, fragments)
+    written = 0
+    for record in translate_records(records, "de", targets):
+        for target, texts in record.translations.items():
+            if texts:
+                record.to_proxy(target).to_dict()
+                written += 1
+    return written
+
+
+def make_proxy(fragment: dict[str, Any]) -> Any:
+    from followthemoney.proxy import EntityProxy
+
+    from ftm_translate.logic.normalize import prepare_texts
+
+    # the proxy was carried along with its prepared texts
+    proxy = EntityProxy.from_dict(fragment)
+    return proxy, prepare_texts(proxy.get("bodyText"))
+
+
+def make_record(fragment: dict[str, Any]) -> Any:
+    from ftm_translate.logic.record import TextRecord
+
+    return TextRecord.from_data(fragment)
+
+
+def measure(
+    run: Run, make: Make, fragments: list[dict[str, Any]], targets: list[str]
+) -> dict:
+    start = time.perf_counter()
+    written = run(fragments, targets)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    run(fragments, targets)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.reset_peak()
+    in_flight = [make(f) for f in fragments]
+    footprint = tracemalloc.get_traced_memory()[0] / len(in_flight)
+    tracemalloc.stop()
+    return {
+        "elapsed": elapsed,
+        "written": written,
+        "peak": peak,
+        "footprint": footprint,
+    }
+
+
+@cli.command()
+def main(
+    count: int = typer.Option(20_000, "-n", help="Number of Page fragments"),
+    text_median: int = typer.Option(200, help="Median chars per text"),
+    text_sigma: float = typer.Option(1.0, help="Lognormal sigma of text lengths"),
+    targets: list[str] = typer.Option(["en"], "-t", help="Target languages"),
+    batch: bool = typer.Option(False, "--batch", help="Use the batch scheduler"),
+    seed: int = typer.Option(42, help="Random seed"),
+):
+    from ftm_translate.logic import base
+
+    # engine stub: only the entity handling is measured
+    base.translate_batch = lambda texts, *args, **kwargs: list(texts)
+
+    fragments = make_fragments(count, text_median, text_sigma, seed)
+    modes: dict[str, tuple[Run, Make]] = {
+        "proxy": (run_proxy_batch if batch else run_proxy, make_proxy),
+        "record": (run_record_batch if batch else run_record, make_record),
+    }
+    label = "batch" if batch else "single"
+    console.print(
+        f"[bold]Hot path: {count} Page fragments -> {', '.join(targets)} "
+        f"({label})[/bold]"
+    )
+    table = Table()
+    table.add_column("Mode")
+    table.add_column("Time", justify="right")
+    table.add_column("Entities/sec", justify="right")
+    table.add_column("Fragments", justify="right")
+    table.add_column("Peak traced", justify="right")
+    table.add_column("Bytes/entity in flight", justify="right")
+    for mode, (run, make) in modes.items():
+        res = measure(run, make, fragments, targets)
+        table.add_row(
+            mode,
+            f"{res['elapsed']:.2f}s",
+            f"{count / res['elapsed']:.0f}",
+            str(res["written"]),
+            f"{res['peak'] / 1024 / 1024:.1f} MB",
+            f"{res['footprint']:.0f}",
+        )
+    console.print(table)
+
+
+if __name__ == "__main__":
+    cli()
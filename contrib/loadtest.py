@@ -0,0 +1,266 @@
+#!/usr/bin/env python
+# flake8: noqa: B008
+"""
+End-to-end load test for the `ftm_translate.tasks.translate` worker.
+
+Usage:
+    python contrib/loadtest.py
+    python contrib/loadtest.py -n 200 --pages-ratio 0.5 --page-count-median 20
+    python contrib/loadtest.py -e argos -n 20
+
+Runs the real task body through procrastinate, but against local stand-ins for
+the OpenAleph stack:
+
+- a sqlite fragment store seeded with synthetic Pages/Page and PlainText
+  entities of configurable size distributions (store reads and the job writer
+  both go there, so the page range fan-out can be aggregated)
+- an in-memory procrastinate queue and redis tracer
+- a capturing `defer.index` that counts entities instead of indexing them
+
+By default the `echo` engine is used, which returns the input (optionally
+throttled to a given chars/sec), so that the worker overhead outside of the
+engine can be measured without any models installed.
+
+Reports documents/min, pages/sec, DB query counts and peak memory, and exits
+with an error if not all documents were indexed (CI runs it with the echo
+engine).
+
+Requires:
+    pip install ftm-translate[openaleph]
+"""
+
+import os
+import random
+import resource
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+import typer
+from rich.console import Console
+
+cli = typer.Typer(no_args_is_help=False)
+console = Console(stderr=True)
+
+DATASET = "loadtest"
+WORDS = (
+    "der die das und ist nicht mit auf für von dem ein eine Vertrag Firma "
+    "Zahlung Konto Bericht Gesellschaft Vorstand Jahr Million Euro Bank "
+    "Steuer Behörde Unterlagen Beteiligung Projekt Auftrag Rechnung"
+).split()
+
+
+def make_text(rng: random.Random, median: int, sigma: float) -> str:
+    """Generate a pseudo German text of lognormal distributed length"""
+    size = max(1, int(rng.lognormvariate(0, sigma) * median))
+    words: list[str] = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)
+
+
+def seed_store(
+    database_uri: str,
+    docs: int,
+    pages_ratio: float,
+    page_count_median: int,
+    page_count_sigma: float,
+    text_median: int,
+    text_sigma: float,
+    seed: int,
+) -> tuple[list, int]:
+    """Write synthetic ingest fragments, return the documents and page count"""
+    from followthemoney.namespace import Namespace
+    from followthemoney.proxy import EntityProxy
+    from followthemoney.util import make_entity_id
+    from ftmq.store.fragments import get_fragments
+
+    rng = random.Random(seed)
+    ns = Namespace(DATASET)
+    store = get_fragments(DATASET, origin="ingest", database_uri=database_uri)
+    bulk = store.bulk()
+    entities = []
+    pages = 0
+    for ix in range(docs):
+        if rng.random() < pages_ratio:
+            doc = EntityProxy.from_dict({"id": ns.sign(f"doc-{ix}"), "schema": "Pages"})
+            doc.add("fileName", f"doc-{ix}.pdf")
+            count = max(
+                1, int(rng.lognormvariate(0, page_count_sigma) * page_count_median)
+            )
+            for page in range(1, count + 1):
+                page_id = ns.sign(make_entity_id(doc.id, page, key_prefix=DATASET))
+                page_entity = EntityProxy.from_dict({"id": page_id, "schema": "Page"})
+                page_entity.add("document", doc.id)
+                page_entity.add("index", page)
+                page_entity.add("bodyText", make_text(rng, text_median, text_sigma))
+                bulk.put(page_entity, "default")
+            pages += count
+        else:
+            doc = EntityProxy.from_dict(
+                {"id": ns.sign(f"doc-{ix}"), "schema": "PlainText"}
+            )
+            doc.add("fileName", f"doc-{ix}.txt")
+            doc.add("bodyText", make_text(rng, text_median, text_sigma))
+        bulk.put(doc, "default")
+        entities.append(doc)
+    bulk.flush()
+    return entities, pages
+
+
+def patch_echo_engine(chars_per_sec: float) -> None:
+    """Replace the engines with a translator that returns its input"""
+    from ftm_translate.logic import apertium, argos
+    from ftm_translate.logic.translator import Translator
+
+    class EchoTranslator(Translator):
+        engine = "argos"
+
+        def _ensure_pair(self) -> bool:
+            return True
+
+        def _translate(self, text: str) -> str:
+            if chars_per_sec:
+                time.sleep(len(text) / chars_per_sec)
+            return text
+
+    translators: dict[tuple[str, str], EchoTranslator] = {}
+
+    def make_translator(source_lang: str, target_lang: str) -> EchoTranslator:
+        key = (source_lang, target_lang)
+        if key not in translators:
+            translators[key] = EchoTranslator(source_lang, target_lang)
+        return translators[key]
+
+    argos.make_translator = make_translator
+    apertium.make_translator = make_translator
+
+
+@cli.command()
+def run(
+    docs: int = typer.Option(100, "-n", "--docs", help="Number of documents"),
+    pages_ratio: float = typer.Option(
+        0.3, "--pages-ratio", help="Share of Pages documents (others are PlainText)"
+    ),
+    page_count_median: int = typer.Option(10, help="Median pages per document"),
+    page_count_sigma: float = typer.Option(1.0, help="Lognormal sigma of page counts"),
+    text_median: int = typer.Option(1500, help="Median chars per text"),
+    text_sigma: float = typer.Option(1.0, help="Lognormal sigma of text lengths"),
+    batch_size: int = typer.Option(10, "-b", help="Documents per job"),
+    engine: str = typer.Option(
+        "echo", "-e", "--engine", help="echo (no translation), argos, apertium"
+    ),
+    chars_per_sec: float = typer.Option(
+        0, help="Throttle the echo engine to this throughput (0 = unthrottled)"
+    ),
+    source: str = typer.Option("de", "-s", "--source", help="Source language"),
+    fanout_pages: Optional[int] = typer.Option(
+        None, help="Override FTM_TRANSLATE_FANOUT_PAGES"
+    ),
+    trace_memory: bool = typer.Option(
+        False, "--tracemalloc", help="Report peak Python allocations (slower)"
+    ),
+    seed: int = typer.Option(42, help="Random seed"),
+    workdir: Optional[Path] = typer.Option(
+        None, help="Directory for the sqlite store (default: temporary)"
+    ),
+):
+    """Run the translate worker against a synthetic local fragment store."""
+    workdir = workdir or Path(tempfile.mkdtemp(prefix="ftm-translate-loadtest-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    database_uri = f"sqlite:///{workdir / 'fragments.db'}"
+
+    # local stand-ins, needs to be set before importing the tasks
+    os.environ["FTM_FRAGMENTS_URI"] = database_uri
+    os.environ["PROCRASTINATE_DB_URI"] = "memory://"
+    os.environ["REDIS_URL"] = "memory://"
+    os.environ.pop("DEBUG", None)
+    if fanout_pages is not None:
+        os.environ["FTM_TRANSLATE_FANOUT_PAGES"] = str(fanout_pages)
+
+    console.print(f"[bold]Load test: {docs} documents ({engine})[/bold]")
+    console.print(f"Seeding {database_uri} ...", end="")
+    entities, pages = seed_store(
+        database_uri,
+        docs,
+        pages_ratio,
+        page_count_median,
+        page_count_sigma,
+        text_median,
+        text_sigma,
+        seed,
+    )
+    console.print(f" [green]{len(entities)} documents, {pages} pages[/green]")
+
+    from openaleph_procrastinate.model import DatasetJob
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    from ftm_translate import tasks
+
+    if engine == "echo":
+        patch_echo_engine(chars_per_sec)
+    else:
+        tasks.settings.engine = engine
+
+    indexed: Counter[str] = Counter()
+
+    def capture_index(app, dataset, entities, **context) -> None:
+        for entity in entities:
+            indexed[entity.schema.name] += 1
+
+    tasks.defer.index = capture_index
+
+    queries: Counter[str] = Counter()
+
+    def count_query(conn, cursor, statement, parameters, context, executemany):
+        queries[statement.split(None, 1)[0].upper()] += 1
+
+    event.listen(Engine, "before_cursor_execute", count_query)
+
+    context = {"ftmstore": DATASET, "namespace": DATASET, "source_language": source}
+    for ix in range(0, len(entities), batch_size):
+        DatasetJob.from_entities(
+            dataset=DATASET,
+            queue="translate",
+            task="ftm_translate.tasks.translate",
+            entities=entities[ix : ix + batch_size],
+            dehydrate=True,
+            **context,
+        ).defer(tasks.app)
+
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    tasks.app.run_worker(queues=["translate"], wait=False)
+    elapsed = time.perf_counter() - start
+    event.remove(Engine, "before_cursor_execute", count_query)
+    traced_peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    tracemalloc.stop()
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    console.print("\n[bold]Results[/bold]")
+    console.print(f"  Time:           {elapsed:.2f}s")
+    console.print(f"  Documents/min:  {len(entities) / elapsed * 60:.1f}")
+    console.print(f"  Pages/sec:      {pages / elapsed:.1f}")
+    console.print(f"  Indexed:        {dict(indexed)}")
+    console.print(f"  DB queries:     {sum(queries.values())} {dict(queries)}")
+    console.print(f"  Peak RSS:       {max_rss:.1f} MB")
+    if traced_peak is not None:
+        console.print(f"  Peak traced:    {traced_peak / 1024 / 1024:.1f} MB")
+
+    documents = Counter(entity.schema.name for entity in entities)
+    missing = {s: n - indexed[s] for s, n in documents.items() if indexed[s] < n}
+    if missing:
+        console.print(f"[red]Documents not indexed: {missing}[/red]")
+        raise typer.Exit(1)
+
+
+if __name__ == "__main__":
+    cli()
@@ -1,16 +1,22 @@
-from typing import Optional
+import json
+import os
+from typing import TYPE_CHECKING, Optional
 
 import typer
 from anystore.cli import ErrorHandler
-from anystore.io import smart_read, smart_write
+from anystore.io import smart_open, smart_write
 from anystore.logging import configure_logging
 from ftmq.io import smart_read_proxies, smart_write_proxies
 from rich.console import Console
+from rich.table import Table
 from typing_extensions import Annotated
 
 from ftm_translate import __version__, logic
 from ftm_translate.settings import Engine, Settings
 
+if TYPE_CHECKING:
+    from ftm_translate.estimate import PairEstimate
+
 settings = Settings()
 cli = typer.Typer(no_args_is_help=True)
 console = Console(stderr=True)
@@ -25,9 +31,27 @@ class Opts:
     TARGET_LANGUAGE = typer.Option(
         settings.target_language, "-t", help="Target language code"
     )
+    TARGET_LANGUAGES = typer.Option(
+        settings.target_languages or [settings.target_language],
+        "-t",
+        help="Target language code (repeat for several)",
+    )
     ENGINE = typer.Option(
-        settings.engine, "-e", help="Translation engine (argos, apertium)"
+        settings.engine, "-e", help="Translation engine (argos, apertium, auto)"
+    )
+    CONCURRENCY = typer.Option(os.cpu_count() or 1, "-c", help="Concurrent jobs")
+    PAIRS = typer.Option(
+        settings.worker_pairs, "-p", help="Language pairs to preload (e.g. de-en)"
     )
+    THREADS = typer.Option(
+        None, "--threads", help="Threads per job (default: cores / concurrent jobs)"
+    )
+    WORKERS = typer.Option(1, "-w", help="Batches to translate in parallel")
+    REFRESH = typer.Option(False, "--refresh", help="Rebuild the index")
+    INSTALL = typer.Option(
+        [], "--install", help="Download argos pairs (e.g. de-en), needs network"
+    )
+    REPORT = typer.Option(None, "-o", help="Write the estimate as json to this uri")
 
 
 @cli.callback(invoke_without_command=True)
@@ -53,15 +77,25 @@ def translate_text(
     source_language: Optional[str] = Opts.SOURCE_LANGUAGE,
     target_language: str = Opts.TARGET_LANGUAGE,
     engine: Engine = Opts.ENGINE,
+    workers: int = Opts.WORKERS,
 ):
-    """Translate a text string and print the result."""
+    """Translate a text and print the result.
+
+    The input is read and translated paragraph by paragraph, and written out
+    in order as soon as each batch is done.
+    """
     with ErrorHandler():
         if source_language is None:
             raise typer.BadParameter("Source language (-s) is required")
-        text = smart_read(input_uri, mode="r")
-        res = logic.translate(text, source_language, target_language, engine)
-        if res is not None:
-            smart_write(output_uri, res)
+        # raw lines, with their line breaks (`smart_stream` strips them from
+        # stdin)
+        with smart_open(input_uri, mode="r") as lines:
+            with smart_open(output_uri, mode="w") as fh:
+                for res in logic.translate_stream(
+                    lines, source_language, target_language, engine, workers=workers
+                ):
+                    fh.write(res)
+                    fh.flush()
 
 
 @cli.command("entities")
@@ -69,22 +103,128 @@ def translate_entities(
     input_uri: str = Opts.IN,
     output_uri: str = Opts.OUT,
     source_language: Optional[str] = Opts.SOURCE_LANGUAGE,
-    target_language: str = Opts.TARGET_LANGUAGE,
+    target_languages: list[str] = Opts.TARGET_LANGUAGES,
     engine: Engine = Opts.ENGINE,
 ):
     """Translate FTM entities from an input stream.
 
-    Reads FollowTheMoney entities, translates their `bodyText` property,
-    and writes the updated entities to the output.
+    Reads FollowTheMoney entities, translates their `bodyText` property into
+    each target language, and writes the updated entities to the output.
 
     Example:
         ftm-translate entities -i entities.ftm.json -o translated.ftm.json -s de
+        ftm-translate entities -i entities.ftm.json -s de -t en -t fr
     """
     with ErrorHandler():
         if source_language is None:
             raise typer.BadParameter("Source language (-s) is required")
         proxies = smart_read_proxies(input_uri)
         translated = logic.translate_entities(
-            proxies, source_language, target_lang=target_language, engine=engine
+            proxies, source_language, target_lang=target_languages, engine=engine
         )
         smart_write_proxies(output_uri, translated)
+
+
+def _format_engine(pair: "PairEstimate") -> str:
+    if not pair.installed:
+        return f"[red]{pair.engine or '-'} (missing)[/red]"
+    if pair.pivot_lang:
+        return f"{pair.engine} (via {pair.pivot_lang})"
+    return str(pair.engine)
+
+
+@cli.command("estimate")
+def estimate_entities(
+    input_uri: str = Opts.IN,
+    output_uri: Optional[str] = Opts.REPORT,
+    source_language: Optional[str] = Opts.SOURCE_LANGUAGE,
+    target_language: str = Opts.TARGET_LANGUAGE,
+    engine: Engine = Opts.ENGINE,
+    concurrency: int = Opts.CONCURRENCY,
+):
+    """Estimate the translation time for FTM entities without translating.
+
+    Tallies the translatable characters per language pair (source language
+    from `-s` or the entities' `detectedLanguage`) and projects CPU-hours and
+    wall time for `-c` concurrent jobs from the recorded engine throughput
+    (`FTM_TRANSLATE_THROUGHPUT_URI`, see `contrib/benchmark.py --save`).
+
+    Example:
+        ftm-translate estimate -i entities.ftm.json -c 16 -e auto
+    """
+    from ftm_translate.estimate import estimate
+
+    with ErrorHandler():
+        proxies = smart_read_proxies(input_uri)
+        res = estimate(proxies, source_language, target_language, engine, concurrency)
+        table = Table(title=f"{res.entities} entities, {concurrency} workers")
+        for column in ("Pair", "Engine", "Segments", "Chars", "Chars/sec", "CPU h"):
+            table.add_column(column)
+        for key, pair in sorted(res.pairs.items(), key=lambda p: -p[1].chars):
+            table.add_row(
+                key,
+                _format_engine(pair),
+                str(pair.segments),
+                str(pair.chars),
+                f"{pair.chars_per_sec:.0f}" if pair.chars_per_sec else "-",
+                f"{pair.cpu_hours:.2f}" if pair.cpu_hours is not None else "-",
+            )
+        console.print(table)
+        console.print(
+            f"CPU-hours: {res.cpu_hours:.2f}, wall time: {res.wall_hours:.2f} h"
+        )
+        if res.missing:
+            console.print(f"[red]Missing models:[/red] {', '.join(res.missing)}")
+        if res.unmeasured:
+            console.print(
+                f"[yellow]No throughput recorded (not included):[/yellow] "
+                f"{', '.join(res.unmeasured)}"
+            )
+        if output_uri:
+            smart_write(output_uri, json.dumps(res.make_report(), indent=2).encode())
+
+
+@cli.command("pairs")
+def list_pairs(
+    refresh: bool = Opts.REFRESH,
+    install: list[str] = Opts.INSTALL,
+):
+    """Show the installed language pairs per engine.
+
+    The pairs are read from the capability index, which translation lookups
+    use without scanning the engines or touching the network. Refresh it after
+    installing models.
+    """
+    from ftm_translate.logic.capabilities import load_index, refresh_index
+    from ftm_translate.worker import parse_pair
+
+    with ErrorHandler():
+        if install:
+            from ftm_translate.logic.argos import install_pair
+
+            for pair in install:
+                console.print(f"Installing argos pair `{pair}` ...")
+                install_pair(*parse_pair(pair))
+        index = refresh_index() if refresh or install else load_index()
+        console.print(f"Capability index ({index.created_at:%Y-%m-%d %H:%M})")
+        for engine, pairs in index.engines.items():
+            console.print(f"[bold]{engine}[/bold] ({len(pairs)}): {', '.join(pairs)}")
+
+
+@cli.command("worker")
+def run_worker(
+    concurrency: int = Opts.CONCURRENCY,
+    pairs: list[str] = Opts.PAIRS,
+    threads: Optional[int] = Opts.THREADS,
+    engine: Engine = Opts.ENGINE,
+):
+    """Run a worker for the `translate` queue.
+
+    Loads the given language pairs once and runs `-c` jobs at the same time in
+    one process, sharing the model weights: each decoder translates that many
+    batches in parallel. Requires the `openaleph` extra.
+    """
+    from ftm_translate.worker import run_worker
+
+    with ErrorHandler():
+        run_worker(concurrency, pairs, engine, threads)
@@ -0,0 +1,168 @@
+"""
+Estimate the translation effort for a stream of entities without translating.
+
+Translatable `bodyText` is tallied per language pair (after `filter_text`,
+normalisation and de-duplication) and projected onto the engine throughput
+recorded by `contrib/benchmark.py --save` (see `FTM_TRANSLATE_THROUGHPUT_URI`).
+Benchmarks measure a single process, so CPU-hours are characters / throughput
+and wall time is CPU-hours spread over the worker processes.
+
+Example:
+    ```bash
+    ftm-translate estimate -i entities.ftm.json -c 16
+    ```
+"""
+
+from hashlib import blake2b
+from typing import Any, Iterable
+
+from followthemoney import EntityProxy
+from pydantic import BaseModel
+from rigour.langs import iso_639_alpha2
+
+from ftm_translate.logic.capabilities import has_pair
+from ftm_translate.logic.normalize import get_segments, prepare_texts
+from ftm_translate.logic.pivot import get_pivot
+from ftm_translate.logic.record import get_normalize
+from ftm_translate.logic.router import get_route, get_throughput
+from ftm_translate.settings import Engine, Settings
+from ftm_translate.util import filter_text
+
+settings = Settings()
+
+UNKNOWN = "unknown"
+
+
+class PairEstimate(BaseModel):
+    source_lang: str
+    target_lang: str
+    engine: Engine | None = None
+    pivot_lang: str | None = None
+    installed: bool = False
+    chars_per_sec: float | None = None
+    segments: int = 0
+    duplicates: int = 0
+    chars: int = 0
+
+    @property
+    def cpu_hours(self) -> float | None:
+        if not self.chars_per_sec:
+            return None
+        return self.chars / self.chars_per_sec / 3600
+
+
+class Estimate(BaseModel):
+    target_lang: str
+    workers: int
+    entities: int = 0
+    skipped: int = 0
+    """Entities already in the target language"""
+    pairs: dict[str, PairEstimate] = {}
+
+    @property
+    def chars(self) -> int:
+        return sum(p.chars for p in self.pairs.values())
+
+    @property
+    def cpu_hours(self) -> float:
+        """CPU-hours of the pairs with known throughput"""
+        return sum(p.cpu_hours or 0 for p in self.pairs.values())
+
+    @property
+    def wall_hours(self) -> float:
+        return self.cpu_hours / max(1, self.workers)
+
+    @property
+    def missing(self) -> list[str]:
+        """Pairs without an installed model (or without source language)"""
+        return [key for key, pair in self.pairs.items() if not pair.installed]
+
+    @property
+    def unmeasured(self) -> list[str]:
+        """Installed pairs without recorded throughput"""
+        return [
+            key
+            for key, pair in self.pairs.items()
+            if pair.installed and not pair.chars_per_sec
+        ]
+
+    def make_report(self) -> dict[str, Any]:
+        """The estimate with its totals, as written to the json report"""
+        data = self.model_dump(mode="json")
+        for key, pair in self.pairs.items():
+            data["pairs"][key]["cpu_hours"] = pair.cpu_hours
+        data["chars"] = self.chars
+        data["cpu_hours"] = self.cpu_hours
+        data["wall_hours"] = self.wall_hours
+        return data
+
+
+def get_pair(
+    source_lang: str, target_lang: str, engine: Engine = settings.engine
+) -> PairEstimate:
+    """Look up the engine that would translate the pair and its throughput"""
+    pair = PairEstimate(source_lang=source_lang, target_lang=target_lang)
+    if source_lang == UNKNOWN:
+        return pair
+    if engine == "auto":
+        # first engine of the route, if any is installed
+        route = get_route(source_lang, target_lang)
+        if not route:
+            return pair
+        engine = route[0]
+    pair.engine = engine
+    pair.installed = has_pair(engine, source_lang, target_lang)
+    pair.chars_per_sec = get_throughput(engine, source_lang, target_lang)
+    if not pair.installed:
+        pair.pivot_lang = get_pivot(engine, source_lang, target_lang)
+    if pair.pivot_lang is not None:
+        pair.installed = True
+        # two hops take the sum of their times per character
+        first = get_throughput(engine, source_lang, pair.pivot_lang)
+        second = get_throughput(engine, pair.pivot_lang, target_lang)
+        if first and second:
+            pair.chars_per_sec = 1 / (1 / first + 1 / second)
+    return pair
+
+
+def estimate(
+    entities: Iterable[EntityProxy],
+    source_lang: str | None = None,
+    target_lang: str = settings.target_language,
+    engine: Engine = settings.engine,
+    workers: int = 1,
+) -> Estimate:
+    """Tally the translatable characters per language pair and project the
+    translation time"""
+    target_lang = iso_639_alpha2(target_lang) or target_lang
+    result = Estimate(target_lang=target_lang, workers=workers)
+    # segment digests for de-duplication, bounded: once full, later
+    # duplicates are counted as segments (over-estimating)
+    seen: set[bytes] = set()
+    for entity in entities:
+        result.entities += 1
+        lang = (
+            source_lang or entity.first("detectedLanguage") or settings.source_language
+        )
+        lang = (iso_639_alpha2(lang) or lang) if lang else UNKNOWN
+        if lang == target_lang:
+            result.skipped += 1
+            continue
+        texts = [t for t in entity.get("bodyText") if filter_text(t)]
+        if not texts:
+            continue
+        key = f"{lang}-{target_lang}"
+        if key not in result.pairs:
+            result.pairs[key] = get_pair(lang, target_lang, engine)
+        pair = result.pairs[key]
+        normalize = get_normalize(entity.schema.name)
+        for segment in get_segments(prepare_texts(texts, normalize=normalize)):
+            digest = blake2b(f"{key}:{segment}".encode(), digest_size=16).digest()
+            if digest in seen:
+                pair.duplicates += 1
+                continue
+            if len(seen) < settings.estimate_dedupe_limit:
+                seen.add(digest)
+            pair.segments += 1
+            pair.chars += len(segment)
+    return result
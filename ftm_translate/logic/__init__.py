@@ -5,6 +5,7 @@ from ftm_translate.logic.base import (
     translate_entities,
     translate_entity,
 )
+from ftm_translate.logic.stream import translate_stream
 
 __all__ = [
     "translate",
@@ -12,4 +13,5 @@ __all__ = [
     "translate_argos",
     "translate_entities",
     "translate_entity",
+    "translate_stream",
 ]
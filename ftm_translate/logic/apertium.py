@@ -5,6 +5,7 @@ from tempfile import NamedTemporaryFile
 from rigour.langs import iso_639_alpha3
 
 from ftm_translate.exceptions import ProcessingException
+from ftm_translate.logic.capabilities import get_pairs, has_pair
 from ftm_translate.logic.translator import Translator
 from ftm_translate.settings import Settings
 
@@ -49,16 +50,12 @@ class ApertiumTranslator(Translator):
 
     def _ensure_pair(self) -> bool:
         """Ensure the language pair is installed."""
-        installed_pairs = get_installed_pairs()
-
-        if self.pair in installed_pairs:
-            return True
-
-        # Check reverse pair (some pairs work bidirectionally)
-        reverse_pair = f"{self.target_alpha3}-{self.source_alpha3}"
-        if reverse_pair in installed_pairs:
+        # The capability index includes reverse pairs as well (some pairs
+        # work bidirectionally)
+        if has_pair("apertium", self.source_lang, self.target_lang):
             return True
 
+        installed_pairs = get_pairs("apertium")
         raise ProcessingException(
             f"Apertium language pair `{self.pair}` is not installed. "
             f"Available pairs: {', '.join(installed_pairs[:10])}..."
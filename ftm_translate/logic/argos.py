@@ -7,19 +7,143 @@ for _logger_name in ("argostranslate", "argostranslate.utils", "stanza"):
     _logger.propagate = False
     _logger.addHandler(logging.NullHandler())
 
-from functools import cache  # noqa: E402
+from functools import cache, cached_property  # noqa: E402
+from threading import Lock  # noqa: E402
+from typing import Any  # noqa: E402
 
 import argostranslate.package  # noqa: E402
 import argostranslate.translate  # noqa: E402
 from rigour.langs import iso_639_alpha2  # noqa: E402
 
 from ftm_translate.exceptions import ProcessingException  # noqa: E402
+from ftm_translate.logic.capabilities import has_pair  # noqa: E402
 from ftm_translate.logic.translator import Translator  # noqa: E402
 from ftm_translate.settings import Settings  # noqa: E402
 
 settings = Settings()
 
 
+def get_installed_pairs() -> list[tuple[str, str]]:
+    """Get the language pairs of the locally installed Argos packages. This
+    is a filesystem-only check that never downloads anything."""
+    return [
+        (pkg.from_code, pkg.to_code)
+        for pkg in argostranslate.package.get_installed_packages()
+    ]
+
+
+def install_pair(source_lang: str, target_lang: str) -> None:
+    """Download and install the Argos package for a language pair. This needs
+    network access and is not used during translation."""
+    source_alpha2 = iso_639_alpha2(source_lang) or source_lang
+    target_alpha2 = iso_639_alpha2(target_lang) or target_lang
+    argostranslate.package.update_package_index()
+    available_packages = argostranslate.package.get_available_packages()
+    matching = [
+        pkg
+        for pkg in available_packages
+        if pkg.from_code == source_alpha2 and pkg.to_code == target_alpha2
+    ]
+
+    if not matching:
+        raise ProcessingException(
+            f"No Argos package available for `{source_alpha2}` -> `{target_alpha2}`"
+        )
+
+    download_path = matching[0].download()
+    argostranslate.package.install_from_path(download_path)
+
+
+# the argostranslate settings, as used by its translations
+argos_settings = argostranslate.translate.settings
+
+# concurrent jobs share one decoder per package
+decoder_lock = Lock()
+
+
+def get_decoder(
+    translation: argostranslate.translate.PackageTranslation,
+) -> Any:
+    """Get the ctranslate2 decoder of an Argos package translation, creating
+    it on first use the same way argostranslate does"""
+    with decoder_lock:
+        if translation.translator is None:
+            # the ctranslate2 Translator
+            translation.translator = argostranslate.translate.Translator(
+                str(translation.pkg.package_path / "model"),
+                device=argos_settings.device,
+                inter_threads=argos_settings.inter_threads,
+                intra_threads=argos_settings.intra_threads,
+                compute_type=argos_settings.compute_type,
+            )
+    return translation.translator
+
+
+def get_packaged(
+    translation: argostranslate.translate.ITranslation,
+) -> argostranslate.translate.PackageTranslation | None:
+    """Get the package translation behind an installed Argos translation:
+    argostranslate wraps each of them into a `CachedTranslation`. Pivot
+    (composite) translations have none."""
+    if isinstance(translation, argostranslate.translate.CachedTranslation):
+        translation = translation.underlying
+    if isinstance(translation, argostranslate.translate.PackageTranslation):
+        return translation
+    return None
+
+
+def translate_packaged(
+    translation: argostranslate.translate.PackageTranslation, texts: list[str]
+) -> list[str]:
+    """Translate texts with one ctranslate2 batch call. Like argostranslate,
+    the texts are split into lines and those into sentences, but the
+    sentences of all texts are decoded together, so that the decoder sees the
+    length-bucketed batch."""
+    pkg = translation.pkg
+    # sentence token ranges of each line of each text
+    layout: list[list[tuple[int, int]]] = []
+    tokenized: list[list[str]] = []
+    for text in texts:
+        lines: list[tuple[int, int]] = []
+        for line in text.split("\n"):
+            start = len(tokenized)
+            for sentence in translation.sentencizer.split_sentences(line):
+                tokenized.append(pkg.tokenizer.encode(sentence))
+            lines.append((start, len(tokenized)))
+        layout.append(lines)
+
+    results: list[list[str]] = []
+    if tokenized:
+        target_prefix = None
+        if pkg.target_prefix != "":
+            target_prefix = [[pkg.target_prefix]] * len(tokenized)
+        results = [
+            res.hypotheses[0]
+            for res in get_decoder(translation).translate_batch(
+                tokenized,
+                target_prefix=target_prefix,
+                replace_unknowns=True,
+                max_batch_size=argos_settings.batch_size,
+                batch_type="tokens",
+                beam_size=max(1, argos_settings.beam_size),
+                num_hypotheses=1,
+                length_penalty=0.2,
+            )
+        ]
+
+    translated: list[str] = []
+    for lines in layout:
+        values: list[str] = []
+        for start, end in lines:
+            tokens = [token for res in results[start:end] for token in res]
+            value = pkg.tokenizer.decode(tokens) if tokens else ""
+            if pkg.target_prefix != "" and value.startswith(pkg.target_prefix):
+                value = value[len(pkg.target_prefix) :]
+            values.append(value.removeprefix(" "))
+        translated.append("\n".join(values).lstrip("\n"))
+    return translated
+
+
 class ArgosTranslator(Translator):
     engine = "argos"
 
@@ -32,39 +156,20 @@ class ArgosTranslator(Translator):
         return iso_639_alpha2(self.target_lang) or self.target_lang
 
     def _ensure_pair(self) -> bool:
-        """Ensure the language pair is installed, downloading if necessary."""
-        # Fast filesystem-only check via installed packages (avoids creating
-        # Translation objects which may trigger lazy network calls).
-        installed_packages = argostranslate.package.get_installed_packages()
-        if any(
-            pkg.from_code == self.source_alpha2 and pkg.to_code == self.target_alpha2
-            for pkg in installed_packages
-        ):
+        """Ensure the language pair is installed, according to the capability
+        index (never downloads anything)."""
+        if has_pair("argos", self.source_alpha2, self.target_alpha2):
             return True
-
-        # Try to download the package
-        self.log.info("Downloading argos language pair ...")
-        argostranslate.package.update_package_index()
-        available_packages = argostranslate.package.get_available_packages()
-        matching = [
-            pkg
-            for pkg in available_packages
-            if pkg.from_code == self.source_alpha2 and pkg.to_code == self.target_alpha2
-        ]
-
-        if not matching:
-            raise ProcessingException(
-                "No Argos package available for ",
-                f"`{self.source_alpha2}` -> `{self.target_alpha2}`",
-            )
-
-        package = matching[0]
-        download_path = package.download()
-        argostranslate.package.install_from_path(download_path)
-        return True
-
-    def _translate(self, text: str) -> str:
-        """Translate text using Argos."""
+        raise ProcessingException(
+            f"Argos language pair `{self.source_alpha2}-{self.target_alpha2}` is "
+            "not installed. Install it with `ftm-translate pairs --install "
+            f"{self.source_alpha2}-{self.target_alpha2}`"
+        )
+
+    @cached_property
+    def translation(self) -> argostranslate.translate.ITranslation:
+        """The installed Argos translation for this pair, looked up once per
+        translator instance."""
         installed_languages = argostranslate.translate.get_installed_languages()
         source_langs = [
             lang for lang in installed_languages if lang.code == self.source_alpha2
@@ -91,7 +196,30 @@ class ArgosTranslator(Translator):
                 f"No Argos translation from `{self.source_alpha2}` to `{self.target_alpha2}`"
             )
 
-        return translation.translate(text)
+        return translation
+
+    def preload(self) -> None:
+        """Load the installed package, its translation objects (tokenizer,
+        sentence splitter) and the ctranslate2 decoder with the model weights"""
+        if self.ensure_pair:
+            packaged = get_packaged(self.translation)
+            if packaged is not None:
+                get_decoder(packaged)
+
+    def _translate(self, text: str) -> str:
+        """Translate text using Argos."""
+        return self.translation.translate(text)
+
+    def translate_batch(self, texts: list[str]) -> list[str | None]:
+        """Translate a batch of texts with one decoder call (packaged
+        translations), or one by one for other Argos translations."""
+        if not texts or not self.ensure_pair:
+            return [None for _ in texts]
+        translation = self.translation
+        packaged = get_packaged(translation)
+        if packaged is not None:
+            return list(translate_packaged(packaged, texts))
+        return [translation.translate(text) for text in texts]
 
 
 @cache
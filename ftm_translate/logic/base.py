@@ -1,4 +1,5 @@
-from typing import Iterable
+from collections import deque
+from typing import TYPE_CHECKING, Any, Generator, Iterable, NamedTuple
 
 from anystore.logging import get_logger
 from followthemoney import E
@@ -6,14 +7,57 @@ from ftmq.types import Entities
 from rigour.langs import iso_639_alpha2
 
 from ftm_translate.exceptions import ProcessingException
+from ftm_translate.logic.budget import Budget, BudgetResult, translate_within
+from ftm_translate.logic.normalize import NormalizeStats, restore_texts
+from ftm_translate.logic.record import TextRecord
+from ftm_translate.logic.scheduler import BucketScheduler
 from ftm_translate.settings import Engine, Settings
-from ftm_translate.util import get_lang_prop
+from ftm_translate.util import PARTIAL_KEY
+
+if TYPE_CHECKING:
+    from ftm_translate.logic.translator import Translator
 
 log = get_logger(__name__)
 
 settings = Settings()
 
 
+def get_translator(
+    source_lang: str,
+    target_lang: str = settings.target_language,
+    engine: Engine = settings.engine,
+) -> "Translator":
+    """Get the cached translator instance for the given engine, translating
+    via a pivot language if the engine has no direct model for the pair.
+    Direct translations into a pivot language share the pivot cache."""
+    engine = engine or settings.engine
+    if engine not in ("argos", "apertium"):
+        raise ProcessingException(f"Unsupported engine: `{engine}`")
+    if settings.pivot_languages:
+        from ftm_translate.logic.pivot import get_pivot, is_pivot, make_cached
+        from ftm_translate.logic.pivot import make_translator as make_pivot
+
+        pivot_lang = get_pivot(engine, source_lang, target_lang)
+        if pivot_lang is not None:
+            return make_pivot(source_lang, pivot_lang, target_lang, engine)
+        if is_pivot(source_lang, target_lang):
+            return make_cached(source_lang, target_lang, engine)
+    return get_engine_translator(source_lang, target_lang, engine)
+
+
+def get_engine_translator(
+    source_lang: str, target_lang: str, engine: Engine
+) -> "Translator":
+    """Get the cached translator instance of the engine for a direct pair"""
+    if engine == "argos":
+        from ftm_translate.logic.argos import make_translator as make_argos
+
+        return make_argos(source_lang, target_lang)
+    from ftm_translate.logic.apertium import make_translator as make_apertium
+
+    return make_apertium(source_lang, target_lang)
+
+
 def translate(
     text: str,
     source_lang: str,
@@ -33,51 +77,257 @@ def translate(
 
     engine = engine or settings.engine
 
-    if engine == "argos":
-        from ftm_translate.logic.argos import translate_argos
+    if engine == "auto":
+        from ftm_translate.logic.router import translate_routed
 
-        return translate_argos(text, source_lang, target_lang)
-    if engine == "apertium":
-        from ftm_translate.logic.apertium import translate_apertium
+        return translate_routed(text, source_lang, target_lang)
+    translator = get_translator(source_lang, target_lang, engine)
+    try:
+        return translator.translate(text)
+    except ProcessingException as e:
+        translator.log.error(str(e))
+        return None
 
-        return translate_apertium(text, source_lang, target_lang)
-    raise ProcessingException(f"Unsupported engine: `{engine}`")
 
-
-def translate_entity(
-    entity: E,
+def translate_batch(
+    texts: list[str],
     source_lang: str,
     target_lang: str = settings.target_language,
     engine: Engine = settings.engine,
-) -> E:
-    _translated = False
+) -> list[str | None]:
+    """Translate a batch of texts with one engine call, keeping their order.
+    Failing batches yield `None` for each of their texts."""
+    source_alpha2 = iso_639_alpha2(source_lang)
+    target_alpha2 = iso_639_alpha2(target_lang)
+    if source_alpha2 is None or target_alpha2 is None:
+        log.error(
+            "Unknown language, skipping translation",
+            source_lang=source_lang,
+            target_lang=target_lang,
+        )
+        return [None for _ in texts]
+    if source_alpha2 == target_alpha2:
+        log.warn(
+            "Source lang is target lang, skipping translation",
+            source_lang=source_lang,
+            target_lang=target_lang,
+        )
+        return [None for _ in texts]
+    source_lang, target_lang = source_alpha2, target_alpha2
+
+    if (engine or settings.engine) == "auto":
+        from ftm_translate.logic.router import translate_batch_routed
+
+        return translate_batch_routed(texts, source_lang, target_lang)
+    try:
+        translator = get_translator(source_lang, target_lang, engine)
+        return translator.translate_batch(texts)
+    except ProcessingException as e:
+        log.error(
+            f"Batch translation failed: {e}",
+            source_lang=source_lang,
+            target_lang=target_lang,
+            segments=len(texts),
+        )
+        return [None for _ in texts]
+
+
+def _set_translations(
+    record: TextRecord,
+    results: Iterable[str | None],
+    source_lang: str,
+    target_lang: str,
+) -> TextRecord:
     _should_translate = False
-    lang_prop = get_lang_prop(entity)
-    for text in entity.get("bodyText"):
+    translated: list[str] = []
+    for res in results:
         _should_translate = True
-        res = translate(text, source_lang, target_lang, engine)
         if res is not None:
-            entity.add("translatedText", res)
-            entity.add(lang_prop, target_lang)
-            _translated = True
-    if not _translated and _should_translate:
+            translated.append(res)
+    if not translated and _should_translate:
         log.warn(
             "Couldn't translate entity!",
-            entity=entity,
+            entity=record.id,
             source_lang=source_lang,
             target_lang=target_lang,
         )
+    record.translations[target_lang] = translated
+    return record
+
+
+def _log_normalize_stats(stats: NormalizeStats, **kwargs: Any) -> None:
+    if stats.texts:
+        log.debug(
+            "Normalized texts",
+            texts=stats.texts,
+            chars_in=stats.chars_in,
+            chars_out=stats.chars_out,
+            reduction=round(stats.reduction, 3),
+            **kwargs,
+        )
+
+
+def _log_budget(record: TextRecord, segments: list[str], res: BudgetResult) -> None:
+    sizes = {
+        "entity": record.id,
+        "chars": sum(map(len, segments)),
+        "segments": len(segments),
+        "seconds": round(res.seconds, 2),
+    }
+    if res.partial:
+        log.warning("Entity over budget, translated partially", **sizes)
+    if res.seconds > settings.slow_entity_seconds:
+        log.warning("Slow entity", **sizes)
+
+
+def get_targets(source_lang: str, target_langs: str | Iterable[str]) -> list[str]:
+    """Get the target languages as list, without the source language"""
+    target_langs = (
+        [target_langs] if isinstance(target_langs, str) else list(target_langs)
+    )
+    source_alpha2 = iso_639_alpha2(source_lang)
+    targets = [t for t in target_langs if iso_639_alpha2(t) != source_alpha2]
+    if len(targets) < len(target_langs):
+        log.warn(
+            "Source lang is target lang, skipping translation",
+            source_lang=source_lang,
+            target_langs=target_langs,
+        )
+    return targets
+
+
+def translate_record(
+    record: TextRecord,
+    source_lang: str,
+    target_langs: str | Iterable[str] = settings.target_language,
+    engine: Engine = settings.engine,
+    budget: Budget | None = None,
+) -> TextRecord:
+    """Translate the texts of a record into the target languages within the
+    budget (default from settings). The segments are shared by all targets.
+    If it is translated only partly, the record is marked as `partial`."""
+    segments = record.segments
+    budget = budget or Budget()
+    for target_lang in get_targets(source_lang, target_langs):
+
+        def _translate_batch(
+            texts: list[str], target_lang: str = target_lang
+        ) -> list[str | None]:
+            return translate_batch(texts, source_lang, target_lang, engine)
+
+        res = translate_within(segments, _translate_batch, budget)
+        _log_budget(record, segments, res)
+        if res.partial:
+            record.partial = True
+        results = restore_texts(record.texts, res.results)
+        _set_translations(record, results, source_lang, target_lang)
+    return record
+
+
+def translate_entity(
+    entity: E,
+    source_lang: str,
+    target_lang: str | Iterable[str] = settings.target_language,
+    engine: Engine = settings.engine,
+    budget: Budget | None = None,
+) -> E:
+    """Translate an entity into one or more target languages within the
+    budget (default from settings). If it is translated only partly, the
+    `translation_partial` context key is set."""
+    stats = NormalizeStats()
+    record = TextRecord.from_proxy(entity, stats)
+    _log_normalize_stats(stats, entity=entity.id)
+    translate_record(record, source_lang, target_lang, engine, budget)
+    for target in record.translations:
+        record.apply(entity, target)
     return entity
 
 
+class _Item(NamedTuple):
+    record: TextRecord
+    allowed: list[str]
+    results: dict[str, list[str | None]]
+
+
+def translate_records(
+    records: Iterable[TextRecord],
+    source_lang: str,
+    target_lang: str | Iterable[str] = settings.target_language,
+    engine: Engine = settings.engine,
+    budget: Budget | None = None,
+) -> Generator[TextRecord, None, None]:
+    """Translate records into one or more target languages, batching their
+    texts through a length-bucketed scheduler per target. Records are
+    yielded in input order. The size budget applies per record; the time
+    budget doesn't, as batches mix records."""
+    targets = get_targets(source_lang, target_lang)
+    budget = budget or Budget()
+
+    def _items() -> Generator[tuple[_Item, list[str]], None, None]:
+        for record in records:
+            segments = record.segments
+            allowed, partial = budget.truncate(segments)
+            if partial:
+                record.partial = True
+                _log_budget(record, segments, BudgetResult(results=[], partial=True))
+            yield _Item(record, allowed, {}), allowed
+
+    def _translate(
+        items: Iterable[tuple[_Item, list[str]]], target_lang: str
+    ) -> Generator[tuple[_Item, list[str]], None, None]:
+        def _translate_batch(texts: list[str]) -> list[str | None]:
+            return translate_batch(texts, source_lang, target_lang, engine)
+
+        scheduler: BucketScheduler[_Item] = BucketScheduler(_translate_batch)
+        for item, results in scheduler.map(items):
+            item.results[target_lang] = results
+            yield item, item.allowed
+
+    # chain the schedulers, so that each record is prepared only once
+    items: Iterable[tuple[_Item, list[str]]] = _items()
+    for target in targets:
+        items = _translate(items, target)
+
+    for item, _ in items:
+        record = item.record
+        skipped = len(record.segments) - len(item.allowed)
+        for target, results in item.results.items():
+            restored = restore_texts(record.texts, results + [None] * skipped)
+            _set_translations(record, restored, source_lang, target)
+        yield record
+
+
 def translate_entities(
     entities: Iterable[E],
     source_lang: str,
-    target_lang: str = settings.target_language,
+    target_lang: str | Iterable[str] = settings.target_language,
     engine: Engine = settings.engine,
+    budget: Budget | None = None,
 ) -> Entities:
-    for entity in entities:
-        try:
-            yield translate_entity(entity, source_lang, target_lang, engine)
-        except ProcessingException as e:
-            log.error(f"Translation failed for `{entity.id}`: {e}")
+    """Translate entities into one or more target languages, batching their
+    texts across entities. Only lean records of the entities go through
+    translation, the translations are added to the entities when yielded
+    (in input order)."""
+    pending: deque[E] = deque()
+    stats = NormalizeStats()
+
+    def _records() -> Generator[TextRecord, None, None]:
+        for entity in entities:
+            try:
+                record = TextRecord.from_proxy(entity, stats)
+            except ProcessingException as e:
+                log.error(f"Translation failed for `{entity.id}`: {e}")
+                continue
+            pending.append(entity)
+            yield record
+
+    for record in translate_records(
+        _records(), source_lang, target_lang, engine, budget
+    ):
+        entity = pending.popleft()
+        for target in record.translations:
+            record.apply(entity, target)
+        if record.partial:
+            entity.context[PARTIAL_KEY] = True
+        yield entity
+    _log_normalize_stats(stats)
@@ -0,0 +1,93 @@
+"""
+Per-entity translation budgets.
+
+A single pathological entity (a huge `bodyText`, or text that makes a model
+loop) must not pin a worker. Each entity gets a budget of characters, engine
+segments and wall-clock seconds. Segments beyond the size budget are not
+translated, and once the time budget is spent no further engine batches are
+started (a running engine call can't be interrupted). Entities translated only
+partly are marked with the `translation_partial` context key; the worker can
+defer them to a low priority job with a larger (but still finite) budget.
+"""
+
+import time
+from typing import Callable
+
+from pydantic import BaseModel
+
+from ftm_translate.settings import Settings
+
+settings = Settings()
+
+BatchTranslator = Callable[[list[str]], list[str | None]]
+
+
+class Budget(BaseModel):
+    chars: int = settings.budget_chars
+    segments: int = settings.budget_segments
+    seconds: float = settings.budget_seconds
+
+    @classmethod
+    def unlimited(cls) -> "Budget":
+        return cls(chars=0, segments=0, seconds=0)
+
+    @classmethod
+    def overflow(cls) -> "Budget":
+        """The larger, but finite, budget of the re-translation of entities
+        that were over budget"""
+        factor = settings.budget_overflow_factor
+        return cls(
+            chars=int(settings.budget_chars * factor),
+            segments=int(settings.budget_segments * factor),
+            seconds=settings.budget_seconds * factor,
+        )
+
+    def truncate(self, segments: list[str]) -> tuple[list[str], bool]:
+        """Get the segments within the size budget (the last one possibly cut
+        at a word boundary) and whether anything was cut off"""
+        allowed = segments[: self.segments] if self.segments else segments
+        if self.chars:
+            res: list[str] = []
+            remaining = self.chars
+            for segment in allowed:
+                if len(segment) > remaining:
+                    head = segment[:remaining].rsplit(None, 1)
+                    if head:
+                        res.append(head[0])
+                    break
+                res.append(segment)
+                remaining -= len(segment)
+            allowed = res
+        truncated = len(allowed) < len(segments) or (
+            bool(allowed) and allowed[-1] != segments[len(allowed) - 1]
+        )
+        return allowed, truncated
+
+
+class BudgetResult(BaseModel):
+    results: list[str | None]
+    partial: bool = False
+    seconds: float = 0
+
+
+def translate_within(
+    segments: list[str],
+    translate_batch: BatchTranslator,
+    budget: Budget,
+    batch_size: int = settings.batch_size,
+) -> BudgetResult:
+    """Translate segments within the budget. Segments that couldn't be
+    translated within the budget are `None` in the results."""
+    start = time.perf_counter()
+    allowed, partial = budget.truncate(segments)
+    results: list[str | None] = [None for _ in segments]
+    step = batch_size if budget.seconds else max(1, len(allowed))
+    for offset in range(0, len(allowed), step):
+        if budget.seconds and time.perf_counter() - start > budget.seconds:
+            partial = True
+            break
+        batch = allowed[offset : offset + step]
+        results[offset : offset + len(batch)] = translate_batch(batch)
+    return BudgetResult(
+        results=results, partial=partial, seconds=time.perf_counter() - start
+    )
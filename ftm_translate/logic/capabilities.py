@@ -0,0 +1,136 @@
+"""
+Index of the language pairs installed for each engine.
+
+Scanning the installed Argos packages or asking `apertium -l` is slow, so the
+pairs are indexed once and persisted to `FTM_TRANSLATE_CAPABILITIES_URI`.
+Lookups on the hot path only read this index and never touch the network:
+a missing pair fails fast instead of blocking a job on a package download.
+
+The index is built on first use if it doesn't exist yet. A pair missing from
+the index triggers one local re-scan per process (no network), so models
+installed after the index was persisted are picked up. It can also be
+refreshed explicitly after installing new models:
+
+    ```bash
+    ftm-translate pairs --refresh
+    ftm-translate pairs --install de-en  # download an argos model
+    ```
+
+Pairs are stored as `<source>-<target>` with ISO 639-1 codes where they
+exist (ISO 639-3 otherwise).
+"""
+
+from datetime import datetime
+from functools import cache
+from typing import Iterable
+
+from anystore.io import smart_read, smart_write
+from anystore.logging import get_logger
+from pydantic import BaseModel, Field
+from rigour.langs import iso_639_alpha2
+
+from ftm_translate.exceptions import ProcessingException
+from ftm_translate.settings import Engine, Settings
+
+log = get_logger(__name__)
+
+settings = Settings()
+
+ENGINES: tuple[Engine, ...] = ("argos", "apertium")
+
+
+def make_pair(source_lang: str, target_lang: str) -> str:
+    """Make the index key for a language pair"""
+    # apertium variants like `oci_aran`
+    source_lang = source_lang.split("_")[0]
+    target_lang = target_lang.split("_")[0]
+    source_alpha2 = iso_639_alpha2(source_lang) or source_lang
+    target_alpha2 = iso_639_alpha2(target_lang) or target_lang
+    return f"{source_alpha2}-{target_alpha2}"
+
+
+class CapabilityIndex(BaseModel):
+    created_at: datetime = Field(default_factory=datetime.now)
+    engines: dict[str, list[str]] = {}
+
+    def has_pair(self, engine: Engine, source_lang: str, target_lang: str) -> bool:
+        return make_pair(source_lang, target_lang) in self.engines.get(engine, [])
+
+
+def scan_engine(engine: Engine) -> list[str] | None:
+    """Get the locally installed pairs of an engine, `None` if the engine
+    isn't installed"""
+    try:
+        if engine == "argos":
+            from ftm_translate.logic.argos import get_installed_pairs as argos_pairs
+
+            return sorted(set(make_pair(*p) for p in argos_pairs()))
+        if engine == "apertium":
+            from ftm_translate.logic.apertium import (
+                get_installed_pairs as apertium_pairs,
+            )
+
+            pairs: set[str] = set()
+            for pair in apertium_pairs():
+                source_lang, _, target_lang = pair.partition("-")
+                # some pairs work bidirectionally
+                pairs.add(make_pair(source_lang, target_lang))
+                pairs.add(make_pair(target_lang, source_lang))
+            return sorted(pairs)
+    except (ImportError, ProcessingException):
+        pass
+    return None
+
+
+def build_index(engines: Iterable[Engine] = ENGINES) -> CapabilityIndex:
+    """Scan the installed pairs of all available engines"""
+    index = CapabilityIndex()
+    for engine in engines:
+        pairs = scan_engine(engine)
+        if pairs is not None:
+            index.engines[engine] = pairs
+            log.info("Indexed installed pairs.", engine=engine, pairs=len(pairs))
+    return index
+
+
+def refresh_index(uri: str = settings.capabilities_uri) -> CapabilityIndex:
+    """Rebuild the index and persist it"""
+    index = build_index()
+    smart_write(uri, index.model_dump_json(indent=2).encode())
+    load_index.cache_clear()
+    return index
+
+
+@cache
+def load_index(uri: str = settings.capabilities_uri) -> CapabilityIndex:
+    """Load the persisted index, building it if it doesn't exist yet"""
+    try:
+        return CapabilityIndex.model_validate_json(smart_read(uri))
+    except FileNotFoundError:
+        log.info("Building capability index ...", uri=uri)
+        return refresh_index(uri)
+
+
+@cache
+def rescan_index(uri: str = settings.capabilities_uri) -> CapabilityIndex:
+    """Rebuild the persisted index once per process"""
+    log.info("Re-scanning installed pairs ...", uri=uri)
+    return refresh_index(uri)
+
+
+def has_pair(
+    engine: Engine,
+    source_lang: str,
+    target_lang: str,
+    uri: str = settings.capabilities_uri,
+) -> bool:
+    """Check if an engine has the language pair installed (no network). On a
+    miss, the installed pairs are scanned again, once per process."""
+    if load_index(uri).has_pair(engine, source_lang, target_lang):
+        return True
+    return rescan_index(uri).has_pair(engine, source_lang, target_lang)
+
+
+def get_pairs(engine: Engine) -> list[str]:
+    """Get the installed pairs of an engine"""
+    return load_index().engines.get(engine, [])
@@ -0,0 +1,169 @@
+"""
+Normalise OCR text before it is sent to a translation engine.
+
+OCR `bodyText` contains hyphenated line breaks, runs of whitespace, separator
+lines, page numbers and table pipes. All of that is tokenised and decoded by
+the engines, costing time and degrading the output. The normaliser collapses
+these patterns, joins broken lines into sentences and splits the text into
+paragraphs. Paragraphs without any letters are not translated but restored as
+they are, and the translated paragraphs are joined again with blank lines, so
+the paragraph structure is kept in `translatedText`.
+
+Only lines that are page numbers in context are removed: with a page label
+("Seite 3", "page 3 of 12"), wrapped in dashes ("- 3 -"), or a bare number
+on the first or last line of a page. Other numbers (amounts, years, table
+cells) are kept.
+"""
+
+import re
+from typing import Iterable
+
+from pydantic import BaseModel
+
+RE_PARAGRAPH = re.compile(r"\n\s*\n")
+RE_SEPARATOR = re.compile(r"^[\s\-_=*~.·•+|¦─━═│┃┼]{3,}$")
+RE_PAGE_LABEL = re.compile(
+    r"^(?:page|seite|p\.|s\.)\s*\d{1,4}(?:\s*(?:/|of|von)\s*\d{1,4})?$",
+    re.IGNORECASE,
+)
+RE_PAGE_DASHED = re.compile(r"^[\-–]+\s*\d{1,4}\s*[\-–]+$")
+RE_PAGE_NUMBER = re.compile(r"^\d{1,4}$")
+RE_HYPHEN = re.compile(r"(\w)[-\u00ad¬]\n(?=([^\W\d_]))")
+RE_PIPES = re.compile(r"\s*[|¦│┃]+\s*")
+RE_PUNCT_RUN = re.compile(r"([^\w\s])\1{3,}")
+RE_WHITESPACE = re.compile(r"\s+")
+RE_LETTER = re.compile(r"[^\W\d_]")
+
+
+class NormalizeStats(BaseModel):
+    texts: int = 0
+    chars_in: int = 0
+    chars_out: int = 0
+
+    @property
+    def reduction(self) -> float:
+        """Share of characters removed before translation"""
+        if not self.chars_in:
+            return 0.0
+        return 1 - self.chars_out / self.chars_in
+
+
+class NormalizedText:
+    """Engine segments of a text and the layout to restore it from their
+    translations. The layout holds a segment index for each translated
+    paragraph, or the paragraph itself if it is passed through."""
+
+    __slots__ = ("segments", "layout")
+
+    def __init__(self) -> None:
+        self.segments: list[str] = []
+        self.layout: list[int | str] = []
+
+    def add(self, paragraph: str) -> None:
+        if RE_LETTER.search(paragraph):
+            self.layout.append(len(self.segments))
+            self.segments.append(paragraph)
+        else:
+            self.layout.append(paragraph)
+
+    def restore(self, results: list[str | None]) -> str | None:
+        """Join the translated segments into paragraphs. Segments that
+        couldn't be translated are left out, `None` if none could be."""
+        paragraphs: list[str] = []
+        translated = False
+        for part in self.layout:
+            if isinstance(part, str):
+                paragraphs.append(part)
+                continue
+            res = results[part]
+            if res is not None:
+                paragraphs.append(res.strip())
+                translated = True
+        if self.segments and not translated:
+            return None
+        return "\n\n".join(p for p in paragraphs if p) or None
+
+    @classmethod
+    def from_text(cls, text: str) -> "NormalizedText":
+        """Pass the whole text through as one segment"""
+        normalized = cls()
+        if text.strip():
+            normalized.layout.append(0)
+            normalized.segments.append(text)
+        return normalized
+
+
+def _dehyphenate(match: re.Match[str]) -> str:
+    # keep the hyphen of compounds like "Nord-\nAmerika"
+    if match.group(2).islower():
+        return match.group(1)
+    return match.group(1) + "-"
+
+
+def _is_noise(line: str, edge: bool = False) -> bool:
+    """Separator lines and page numbers (bare numbers only on the first or
+    last line of a page)"""
+    line = line.strip()
+    return bool(
+        RE_SEPARATOR.match(line)
+        or RE_PAGE_LABEL.match(line)
+        or RE_PAGE_DASHED.match(line)
+        or (edge and RE_PAGE_NUMBER.match(line))
+    )
+
+
+def _clean_page(page: str) -> str:
+    lines = page.split("\n")
+    filled = [ix for ix, line in enumerate(lines) if line.strip()]
+    edges = {filled[0], filled[-1]} if filled else set()
+    return "\n".join(
+        line for ix, line in enumerate(lines) if not _is_noise(line, ix in edges)
+    )
+
+
+def normalize_text(text: str, stats: NormalizeStats | None = None) -> NormalizedText:
+    """Clean up OCR text and split it into paragraphs"""
+    normalized = NormalizedText()
+    chars_in = len(text)
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    # form feeds separate pages
+    text = "\n\n".join(_clean_page(page) for page in text.split("\f"))
+    for block in RE_PARAGRAPH.split(text):
+        paragraph = RE_HYPHEN.sub(_dehyphenate, block)
+        paragraph = RE_PIPES.sub(" ", paragraph)
+        paragraph = RE_PUNCT_RUN.sub(" ", paragraph)
+        paragraph = RE_WHITESPACE.sub(" ", paragraph).strip()
+        if paragraph:
+            normalized.add(paragraph)
+    if stats is not None:
+        stats.texts += 1
+        stats.chars_in += chars_in
+        stats.chars_out += sum(map(len, normalized.segments))
+    return normalized
+
+
+def prepare_texts(
+    texts: Iterable[str], stats: NormalizeStats | None = None, normalize: bool = True
+) -> list[NormalizedText]:
+    """Normalise the texts (or pass them through as they are)"""
+    if normalize:
+        return [normalize_text(text, stats) for text in texts]
+    return [NormalizedText.from_text(text) for text in texts]
+
+
+def get_segments(texts: Iterable[NormalizedText]) -> list[str]:
+    """Get the engine segments of the given texts in order"""
+    return [segment for text in texts for segment in text.segments]
+
+
+def restore_texts(
+    texts: Iterable[NormalizedText], results: list[str | None]
+) -> list[str | None]:
+    """Restore each text from the results for `get_segments(texts)`"""
+    restored: list[str | None] = []
+    offset = 0
+    for text in texts:
+        size = len(text.segments)
+        restored.append(text.restore(results[offset : offset + size]))
+        offset += size
+    return restored
@@ -0,0 +1,181 @@
+"""
+Pivot translation through an intermediate language.
+
+If an engine has no model for a language pair, but models from the source
+language into one of the `pivot_languages` and from there into the target
+language (according to the capability index), texts are translated in two
+hops, e.g. uk -> en -> de.
+
+The output of the first hop is cached, so translating the same corpus into
+several target languages decodes the source language only once. Direct
+translations into a pivot language read and fill the same cache, so that
+translating into the pivot language and another target (e.g. uk -> en, fr)
+reuses the direct result as first hop (and vice versa). By default
+the cache is a bounded in-process LRU (`FTM_TRANSLATE_PIVOT_CACHE_SIZE`
+entries, which covers the targets of the texts in flight); set
+`FTM_TRANSLATE_PIVOT_CACHE_URI` to a persistent anystore store to share it
+between processes and runs.
+"""
+
+from collections import OrderedDict
+from functools import cache
+from hashlib import sha1
+from threading import Lock
+from typing import Any
+
+from anystore import get_store
+from anystore.store import Store
+
+from ftm_translate.logic.capabilities import has_pair, make_pair
+from ftm_translate.logic.translator import Translator
+from ftm_translate.settings import Engine, Settings
+
+settings = Settings()
+
+
+@cache
+def get_pivot(engine: Engine, source_lang: str, target_lang: str) -> str | None:
+    """Get the pivot language for a pair without direct model, if any"""
+    if has_pair(engine, source_lang, target_lang):
+        return None
+    for pivot_lang in settings.pivot_languages:
+        if pivot_lang in make_pair(source_lang, target_lang).split("-"):
+            continue
+        if has_pair(engine, source_lang, pivot_lang) and has_pair(
+            engine, pivot_lang, target_lang
+        ):
+            return pivot_lang
+    return None
+
+
+def is_pivot(source_lang: str, target_lang: str) -> bool:
+    """Check if a pair translates into a pivot language"""
+    source_lang, target_lang = make_pair(source_lang, target_lang).split("-")
+    return source_lang != target_lang and target_lang in settings.pivot_languages
+
+
+class LRUCache:
+    """Bounded in-process cache with the `get` / `put` interface of a store"""
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.data: OrderedDict[str, str] = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, key: str, raise_on_nonexist: bool = False) -> str | None:
+        with self.lock:
+            value = self.data.get(key)
+            if value is not None:
+                self.data.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: str) -> None:
+        if self.size < 1:
+            return
+        with self.lock:
+            self.data[key] = value
+            self.data.move_to_end(key)
+            while len(self.data) > self.size:
+                self.data.popitem(last=False)
+
+
+@cache
+def get_cache() -> Store[Any, Any] | LRUCache:
+    if settings.pivot_cache_uri:
+        return get_store(settings.pivot_cache_uri)
+    return LRUCache(settings.pivot_cache_size)
+
+
+class CachedTranslator(Translator):
+    """Direct translation into a pivot language, through the pivot cache"""
+
+    def __init__(self, translator: Translator) -> None:
+        self.engine = translator.engine
+        self.translator = translator
+        super().__init__(translator.source_lang, translator.target_lang)
+
+    def _ensure_pair(self) -> bool:
+        return self.translator.ensure_pair
+
+    def preload(self) -> None:
+        self.translator.preload()
+
+    def make_key(self, text: str) -> str:
+        checksum = sha1(text.encode()).hexdigest()
+        return f"{self.engine}/{self.source_lang}-{self.target_lang}/{checksum}"
+
+    def _translate(self, text: str) -> str | None:
+        return self.translate_batch([text])[0]
+
+    def translate_batch(self, texts: list[str]) -> list[str | None]:
+        results: list[str | None] = [None for _ in texts]
+        if not texts or not self.ensure_pair:
+            return results
+        store = get_cache()
+        keys = [self.make_key(text) for text in texts]
+        results = [store.get(key, raise_on_nonexist=False) for key in keys]
+        missing = [ix for ix, res in enumerate(results) if res is None]
+        if missing:
+            translated = self.translator.translate_batch([texts[ix] for ix in missing])
+            for ix, res in zip(missing, translated, strict=True):
+                if res is not None:
+                    store.put(keys[ix], res)
+                    results[ix] = res
+        return results
+
+
+class PivotTranslator(Translator):
+    def __init__(
+        self,
+        source_lang: str,
+        pivot_lang: str,
+        target_lang: str,
+        engine: Engine,
+    ) -> None:
+        from ftm_translate.logic.base import get_translator
+
+        self.engine = engine
+        self.pivot_lang = pivot_lang
+        # translates through the pivot cache
+        self.first = get_translator(source_lang, pivot_lang, engine)
+        self.second = get_translator(pivot_lang, target_lang, engine)
+        super().__init__(source_lang, target_lang)
+        self.log.info("Translating via pivot language", pivot_lang=pivot_lang)
+
+    def _ensure_pair(self) -> bool:
+        return self.first.ensure_pair and self.second.ensure_pair
+
+    def preload(self) -> None:
+        self.first.preload()
+        self.second.preload()
+
+    def _translate(self, text: str) -> str | None:
+        return self.translate_batch([text])[0]
+
+    def translate_batch(self, texts: list[str]) -> list[str | None]:
+        results: list[str | None] = [None for _ in texts]
+        if not texts or not self.ensure_pair:
+            return results
+        pivots = self.first.translate_batch(texts)
+        todo = [(ix, res) for ix, res in enumerate(pivots) if res is not None]
+        if todo:
+            translated = self.second.translate_batch([res for _, res in todo])
+            for (ix, _), res in zip(todo, translated, strict=True):
+                results[ix] = res
+        return results
+
+
+@cache
+def make_cached(source_lang: str, target_lang: str, engine: Engine) -> CachedTranslator:
+    """Get cached translator instance for a direct pair into a pivot language"""
+    from ftm_translate.logic.base import get_engine_translator
+
+    return CachedTranslator(get_engine_translator(source_lang, target_lang, engine))
+
+
+@cache
+def make_translator(
+    source_lang: str, pivot_lang: str, target_lang: str, engine: Engine
+) -> PivotTranslator:
+    """Get cached pivot translator instance"""
+    return PivotTranslator(source_lang, pivot_lang, target_lang, engine)
@@ -0,0 +1,148 @@
+"""
+Lean entity records for the translation hot path.
+
+Carrying full `EntityProxy` objects (every property, values validated on
+construction) through translation and building yet another proxy for each
+translation fragment dominates the CPU time outside of the engine for large
+numbers of small entities. A `TextRecord` holds only what translation needs:
+the entity ID, schema name and caption, the prepared texts of `bodyText` and the
+language hint. It is built from a raw entity dict (e.g. a store fragment)
+without property validation, and a proxy is only materialised for the
+translation fragment at the write boundary.
+"""
+
+from typing import Any
+
+from followthemoney import E, EntityProxy, model
+from ftmq.util import make_entity
+
+from ftm_translate.exceptions import ProcessingException
+from ftm_translate.logic.normalize import (
+    NormalizedText,
+    NormalizeStats,
+    get_segments,
+    prepare_texts,
+)
+from ftm_translate.settings import Settings
+from ftm_translate.util import PARTIAL_KEY, TIER_KEY, Tier, get_lang_prop
+
+settings = Settings()
+
+
+def get_normalize(schema: str) -> bool:
+    """Normalise the texts of entities with OCR text only"""
+    return settings.normalize and schema in settings.normalize_schemata
+
+
+def get_caption(data: dict[str, Any]) -> str | None:
+    """Get the caption of a raw entity dict from the caption properties of its
+    schema, like `EntityProxy.caption` does"""
+    caption: str | None = data.get("caption")
+    if caption:
+        return caption
+    schema = model.get(data["schema"])
+    if schema is None:
+        return None
+    properties = data.get("properties", {})
+    for prop in schema.caption:
+        values: list[str] = properties.get(prop, [])
+        if values:
+            return values[0]
+    return None
+
+
+class TextRecord:
+    """The texts of an entity to translate and their translations per target
+    language"""
+
+    __slots__ = (
+        "id",
+        "schema",
+        "texts",
+        "language",
+        "caption",
+        "translations",
+        "partial",
+    )
+
+    def __init__(
+        self,
+        id: str,
+        schema: str,
+        texts: list[NormalizedText],
+        language: str | None = None,
+        caption: str | None = None,
+    ) -> None:
+        self.id = id
+        self.schema = schema
+        self.texts = texts
+        self.language = language
+        self.caption = caption
+        self.translations: dict[str, list[str]] = {}
+        self.partial = False
+
+    @classmethod
+    def from_data(
+        cls, data: dict[str, Any], stats: NormalizeStats | None = None
+    ) -> "TextRecord":
+        """Make a record from a raw entity dict, without building a proxy"""
+        properties = data.get("properties", {})
+        languages = properties.get("detectedLanguage")
+        return cls(
+            data["id"],
+            data["schema"],
+            prepare_texts(
+                properties.get("bodyText", []), stats, get_normalize(data["schema"])
+            ),
+            languages[0] if languages else None,
+            get_caption(data),
+        )
+
+    @classmethod
+    def from_proxy(
+        cls, entity: EntityProxy, stats: NormalizeStats | None = None
+    ) -> "TextRecord":
+        """Make a record from an entity proxy"""
+        if entity.id is None:
+            raise ProcessingException("Entity has no ID.")
+        return cls(
+            entity.id,
+            entity.schema.name,
+            prepare_texts(
+                entity.get("bodyText"), stats, get_normalize(entity.schema.name)
+            ),
+            entity.first("detectedLanguage"),
+            entity.caption,
+        )
+
+    @property
+    def segments(self) -> list[str]:
+        return get_segments(self.texts)
+
+    def apply(self, entity: E, target_lang: str) -> E:
+        """Add the translation into the target language to the entity"""
+        texts = self.translations.get(target_lang)
+        if texts:
+            entity.add("translatedText", texts)
+            entity.add(get_lang_prop(entity), target_lang)
+        if self.partial:
+            entity.context[PARTIAL_KEY] = True
+        return entity
+
+    def to_proxy(
+        self,
+        target_lang: str,
+        tier: Tier | None = None,
+    ) -> EntityProxy:
+        """Materialise the translation fragment for the target language,
+        optionally marked with its translation tier and as partial
+        translation"""
+        data: dict[str, Any] = {"id": self.id, "schema": self.schema}
+        if self.caption is not None:
+            data["caption"] = self.caption
+        if tier is not None:
+            data[TIER_KEY] = tier
+        if self.partial:
+            data[PARTIAL_KEY] = True
+        # values are validated here, at the write boundary
+        return self.apply(make_entity(data, EntityProxy), target_lang)
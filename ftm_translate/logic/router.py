@@ -0,0 +1,123 @@
+"""
+Route translations per language pair to the engine that serves it best.
+
+Candidates are the `router_engines` that have the pair installed locally
+(according to the capability index), ranked by the throughput recorded by
+`contrib/benchmark.py --save`. Short texts can be sent to a preferred (higher
+quality) engine first. Engines that only reach the pair through a pivot
+language are tried last. If an engine fails or returns nothing, the next one in
+the route is used.
+
+Throughput stats format (chars/sec per engine, pair and benchmark mode):
+
+    {"apertium": {"de-en": {"full": 8736.0, "sentences": 1145.0}}}
+"""
+
+import json
+from functools import cache
+from typing import TypeAlias
+
+from anystore.io import smart_read
+from anystore.logging import get_logger
+
+from ftm_translate.logic.base import get_translator
+from ftm_translate.logic.capabilities import has_pair
+from ftm_translate.logic.pivot import get_pivot
+from ftm_translate.settings import Engine, Settings
+
+log = get_logger(__name__)
+
+settings = Settings()
+
+ThroughputStats: TypeAlias = dict[str, dict[str, dict[str, float]]]
+
+
+@cache
+def load_throughput(uri: str | None = settings.throughput_uri) -> ThroughputStats:
+    """Load recorded engine throughput stats"""
+    if not uri:
+        return {}
+    try:
+        stats: ThroughputStats = json.loads(smart_read(uri, mode="r"))
+        return stats
+    except Exception as e:
+        log.warning(f"Couldn't load throughput stats: {e}", uri=uri)
+        return {}
+
+
+def get_throughput(
+    engine: Engine, source_lang: str, target_lang: str, mode: str = "full"
+) -> float | None:
+    """Get recorded chars/sec for an engine and pair, preferring the given
+    benchmark mode (`full` or `sentences`)"""
+    pair = load_throughput().get(engine, {}).get(f"{source_lang}-{target_lang}")
+    if not pair:
+        return None
+    return pair.get(mode) or next(iter(pair.values()), None)
+
+
+def get_route(source_lang: str, target_lang: str, length: int = 0) -> list[Engine]:
+    """Get the engines to try for a pair and text length, in order. Engines
+    that can only translate the pair via a pivot language come last."""
+    engines = [
+        e for e in settings.router_engines if has_pair(e, source_lang, target_lang)
+    ]
+    pivoted = [
+        e
+        for e in settings.router_engines
+        if e not in engines and get_pivot(e, source_lang, target_lang)
+    ]
+    mode = "full"
+    if length < settings.router_short_text:
+        mode = "sentences"
+        if settings.router_short_engine in engines:
+            engines.remove(settings.router_short_engine)
+            return [settings.router_short_engine] + engines + pivoted
+
+    def _rank(engine: Engine) -> float:
+        return -(get_throughput(engine, source_lang, target_lang, mode) or 0)
+
+    # stable sort keeps the configured order for engines without stats
+    return sorted(engines, key=_rank) + pivoted
+
+
+def translate_routed(text: str, source_lang: str, target_lang: str) -> str | None:
+    """Translate a text with the best engine for the pair, falling back to the
+    next engine if one fails"""
+    return translate_batch_routed([text], source_lang, target_lang)[0]
+
+
+def translate_batch_routed(
+    texts: list[str], source_lang: str, target_lang: str
+) -> list[str | None]:
+    """Translate a batch of texts with the best engine for the pair. Texts an
+    engine fails on are passed on to the next engine in the route."""
+    results: list[str | None] = [None for _ in texts]
+    route = get_route(source_lang, target_lang, max(map(len, texts), default=0))
+    if not route:
+        log.error(
+            "No engine installed for language pair",
+            source_lang=source_lang,
+            target_lang=target_lang,
+            engines=settings.router_engines,
+        )
+        return results
+    todo = list(range(len(texts)))
+    for engine in route:
+        try:
+            translator = get_translator(source_lang, target_lang, engine)
+            translated = translator.translate_batch([texts[ix] for ix in todo])
+        except Exception as e:
+            log.warning(
+                f"Engine failed, falling back: {e}",
+                engine=engine,
+                source_lang=source_lang,
+                target_lang=target_lang,
+            )
+            continue
+        for ix, res in zip(todo, translated, strict=True):
+            results[ix] = res
+        todo = [ix for ix in todo if results[ix] is None]
+        if not todo:
+            break
+    return results
@@ -0,0 +1,155 @@
+"""
+Length-bucketed batch scheduling of text segments.
+
+Engines decode a batch padded to its longest segment, so mixing one-word
+spreadsheet cells with full OCR pages in one batch wastes most of the work on
+padding. The scheduler buffers segments, groups them into buckets of similar
+character length, dispatches a bucket once it is full (or has waited longer
+than the timeout) and hands results back in the original input order.
+"""
+
+import time
+from bisect import bisect_left
+from collections import deque
+from typing import Any, Callable, Generator, Generic, Iterable, TypeVar
+
+from anystore.logging import get_logger
+from pydantic import BaseModel
+
+from ftm_translate.settings import Settings
+
+log = get_logger(__name__)
+
+settings = Settings()
+
+T = TypeVar("T")
+
+BatchTranslator = Callable[[list[str]], list[str | None]]
+
+
+class SchedulerStats(BaseModel):
+    batches: int = 0
+    segments: int = 0
+    chars: int = 0
+    padded_chars: int = 0
+
+    @property
+    def padding_efficiency(self) -> float:
+        """Share of dispatched characters that are not padding (1.0 = none)"""
+        if not self.padded_chars:
+            return 1.0
+        return self.chars / self.padded_chars
+
+
+class _Item(Generic[T]):
+    __slots__ = ("payload", "results", "missing")
+
+    def __init__(self, payload: T, size: int) -> None:
+        self.payload = payload
+        self.results: list[str | None] = [None] * size
+        self.missing = size
+
+
+class _Bucket:
+    __slots__ = ("segments", "started")
+
+    def __init__(self) -> None:
+        self.segments: list[tuple[_Item[Any], int, str]] = []
+        self.started = 0.0
+
+
+class BucketScheduler(Generic[T]):
+    """
+    Dispatch text segments to a batch translation function grouped by length.
+
+    Example:
+        ```python
+        scheduler = BucketScheduler(translator.translate_batch)
+        for entity, results in scheduler.map(
+            (e, e.get("bodyText")) for e in entities
+        ):
+            ...
+        ```
+    """
+
+    def __init__(
+        self,
+        translate_batch: BatchTranslator,
+        batch_size: int = settings.batch_size,
+        buckets: Iterable[int] = settings.batch_buckets,
+        timeout: float = settings.batch_timeout,
+        max_pending: int | None = None,
+    ) -> None:
+        self.translate_batch = translate_batch
+        self.batch_size = max(1, batch_size)
+        self.bounds = sorted(buckets)
+        self.timeout = timeout
+        self.max_pending = max_pending or self.batch_size * (len(self.bounds) + 1)
+        self.buckets = [_Bucket() for _ in range(len(self.bounds) + 1)]
+        self.stats = SchedulerStats()
+
+    def get_bucket(self, text: str) -> _Bucket:
+        return self.buckets[bisect_left(self.bounds, len(text))]
+
+    def submit(self, item: _Item[T], ix: int, text: str) -> None:
+        bucket = self.get_bucket(text)
+        if not bucket.segments:
+            bucket.started = time.monotonic()
+        bucket.segments.append((item, ix, text))
+        if len(bucket.segments) >= self.batch_size:
+            self.dispatch(bucket)
+
+    def dispatch(self, bucket: _Bucket) -> None:
+        segments, bucket.segments = bucket.segments, []
+        if not segments:
+            return
+        texts = [text for _, _, text in segments]
+        results = self.translate_batch(texts)
+        lengths = [len(text) for text in texts]
+        self.stats.batches += 1
+        self.stats.segments += len(texts)
+        self.stats.chars += sum(lengths)
+        self.stats.padded_chars += max(lengths) * len(lengths)
+        for (item, ix, _), result in zip(segments, results, strict=True):
+            item.results[ix] = result
+            item.missing -= 1
+
+    def dispatch_expired(self) -> None:
+        now = time.monotonic()
+        for bucket in self.buckets:
+            if bucket.segments and now - bucket.started >= self.timeout:
+                self.dispatch(bucket)
+
+    def flush(self) -> None:
+        for bucket in self.buckets:
+            self.dispatch(bucket)
+
+    def map(
+        self, items: Iterable[tuple[T, list[str]]]
+    ) -> Generator[tuple[T, list[str | None]], None, None]:
+        """Translate the texts of each item, yielding `(item, results)` in the
+        order of the input as soon as all segments of an item are done."""
+        pending: deque[_Item[T]] = deque()
+        for payload, texts in items:
+            item = _Item(payload, len(texts))
+            pending.append(item)
+            for ix, text in enumerate(texts):
+                self.submit(item, ix, text)
+            self.dispatch_expired()
+            if len(pending) > self.max_pending:
+                self.flush()
+            while pending and not pending[0].missing:
+                done = pending.popleft()
+                yield done.payload, done.results
+        self.flush()
+        while pending:
+            done = pending.popleft()
+            yield done.payload, done.results
+        if self.stats.batches:
+            log.info(
+                "Batch scheduler finished.",
+                batches=self.stats.batches,
+                segments=self.stats.segments,
+                chars=self.stats.chars,
+                padding_efficiency=round(self.stats.padding_efficiency, 3),
+            )
@@ -0,0 +1,115 @@
+"""
+Translate large plain text inputs as a stream.
+
+The input lines are grouped into paragraphs (split on blank lines, long
+paragraphs are split further at line boundaries), translated in batches and
+yielded in input order as soon as each batch is done, so memory stays bounded
+by the number of batches in flight and output appears immediately.
+"""
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from typing import Generator, Iterable, TypeAlias
+
+from anystore.logging import get_logger
+
+from ftm_translate.logic.base import translate_batch
+from ftm_translate.settings import Engine, Settings
+
+log = get_logger(__name__)
+
+settings = Settings()
+
+# paragraph text and the line breaks that followed it in the input
+Chunk: TypeAlias = tuple[str, str]
+
+
+def iter_chunks(
+    lines: Iterable[str], max_chars: int = settings.stream_chunk_chars
+) -> Generator[Chunk, None, None]:
+    """Group input lines (including their line breaks) into paragraph chunks
+    of at most `max_chars` (unless a single line is longer)"""
+    buffer: list[str] = []
+    size = 0
+    tail = ""
+
+    def _flush() -> Chunk:
+        content = "".join(buffer)
+        text = content.rstrip("\r\n")
+        return text, content[len(text) :] + tail
+
+    for line in lines:
+        if not line.strip():
+            tail += line
+            continue
+        if buffer and (tail or size + len(line) > max_chars):
+            yield _flush()
+            buffer, size = [], 0
+        elif tail:  # leading blank lines
+            yield "", tail
+        tail = ""
+        buffer.append(line)
+        size += len(line)
+    if buffer:
+        yield _flush()
+    elif tail:
+        yield "", tail
+
+
+def translate_chunks(
+    chunks: list[Chunk],
+    source_lang: str,
+    target_lang: str = settings.target_language,
+    engine: Engine = settings.engine,
+) -> str:
+    """Translate a batch of chunks and join them with their original line
+    breaks. Chunks that couldn't be translated are passed through as they
+    are."""
+    texts = [text for text, _ in chunks if text.strip()]
+    results = iter(translate_batch(texts, source_lang, target_lang, engine))
+    out: list[str] = []
+    for text, sep in chunks:
+        if text.strip():
+            res = next(results)
+            if res is None:
+                log.warning("Couldn't translate chunk, keeping source", chars=len(text))
+                res = text
+            out.append(res)
+        out.append(sep)
+    return "".join(out)
+
+
+def translate_stream(
+    lines: Iterable[str],
+    source_lang: str,
+    target_lang: str = settings.target_language,
+    engine: Engine = settings.engine,
+    batch_size: int = settings.batch_size,
+    workers: int = 1,
+) -> Generator[str, None, None]:
+    """Translate text lines as a stream of translated batches in input order,
+    with up to `workers` batches translated in parallel"""
+    chunks = iter_chunks(lines)
+
+    def _batches() -> Generator[list[Chunk], None, None]:
+        while batch := list(islice(chunks, batch_size)):
+            yield batch
+
+    if workers < 2:
+        for batch in _batches():
+            yield translate_chunks(batch, source_lang, target_lang, engine)
+        return
+
+    pending: deque[Future[str]] = deque()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for batch in _batches():
+            pending.append(
+                executor.submit(
+                    translate_chunks, batch, source_lang, target_lang, engine
+                )
+            )
+            if len(pending) >= workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
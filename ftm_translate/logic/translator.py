@@ -49,6 +49,16 @@ class Translator(ABC):
             return self._translate(text)
         return None
 
+    def preload(self) -> None:
+        """Load the language pair before the worker takes jobs, so that the
+        concurrent jobs share it"""
+        self.ensure_pair
+
+    def translate_batch(self, texts: list[str]) -> list[str | None]:
+        """Translate a batch of text inputs, keeping their order. Engines that
+        can decode several segments at once should override this."""
+        return [self.translate(text) for text in texts]
+
     def error(self) -> None:
         raise ProcessingException(
             f"Couldn't translate `{self.source_lang}` -> `{self.target_lang}` "
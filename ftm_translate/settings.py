@@ -1,9 +1,10 @@
+from pathlib import Path
 from typing import Literal, TypeAlias
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
-Engine: TypeAlias = Literal["argos", "apertium"]
+Engine: TypeAlias = Literal["argos", "apertium", "auto"]
 
 
 class Settings(BaseSettings):
@@ -21,10 +22,114 @@ class Settings(BaseSettings):
     )
 
     engine: Engine = Field(default="argos")
-    """Translation engine to use (needs to be installed): argos / apertium"""
+    """Translation engine to use (needs to be installed): argos / apertium, or
+    auto to route per language pair (see `router_*` settings)"""
 
     source_language: str | None = Field(default=None)
     """Globally configure source language (None for auto-detect if supported)"""
 
     target_language: str = Field(default="en")
     """Globally configure target language"""
+
+    target_languages: list[str] = Field(default=[])
+    """Translate into several target languages in one pass (overrides
+    `target_language` for the worker and the `entities` command)"""
+
+    batch_size: int = Field(default=32)
+    """Maximum number of text segments per engine batch"""
+
+    batch_buckets: list[int] = Field(default=[64, 256, 1024, 4096])
+    """Upper character length bounds of the batch buckets (longer segments go
+    into an open-ended last bucket)"""
+
+    batch_timeout: float = Field(default=1.0)
+    """Seconds after which a partially filled bucket is dispatched anyway"""
+
+    normalize: bool = Field(default=True)
+    """Normalise OCR text (line breaks, hyphenation, separators, page numbers,
+    table pipes) before translation, keeping its paragraphs"""
+
+    normalize_schemata: list[str] = Field(default=["Page", "Pages", "Image"])
+    """Entity schemata with OCR text to normalise, the texts of other
+    entities are translated as they are"""
+
+    stream_chunk_chars: int = Field(default=2000)
+    """Maximum characters per paragraph chunk when streaming text input
+    (longer paragraphs are split at line breaks)"""
+
+    budget_chars: int = Field(default=0)
+    """Maximum characters translated per entity, the rest is marked as partial
+    translation (0 for no limit)"""
+
+    budget_segments: int = Field(default=0)
+    """Maximum text segments (paragraphs) translated per entity (0 for no
+    limit)"""
+
+    budget_seconds: float = Field(default=0)
+    """Wall-clock seconds per entity after which no further engine batches are
+    started (0 for no limit)"""
+
+    budget_overflow: Literal["truncate", "defer"] = Field(default="truncate")
+    """Worker: keep the partial translation of entities over budget (truncate),
+    or also re-translate them with the overflow budget in a low priority job
+    (defer)"""
+
+    budget_overflow_factor: float = Field(default=10)
+    """Worker: budget of the overflow job as a multiple of the budget"""
+
+    slow_entity_seconds: float = Field(default=60)
+    """Log entities that take longer than this to translate"""
+
+    fanout_pages: int = Field(default=250)
+    """Split Pages documents with more pages into parallel page range sub-jobs
+    of this size (0 to disable)"""
+
+    router_engines: list[Engine] = Field(default=["apertium", "argos"])
+    """Engines the `auto` router chooses from and falls back to, in order of
+    preference if no throughput stats are available"""
+
+    router_short_text: int = Field(default=0)
+    """Texts shorter than this many characters are routed to
+    `router_short_engine` first (0 to disable)"""
+
+    router_short_engine: Engine = Field(default="argos")
+    """Preferred engine for short texts"""
+
+    throughput_uri: str | None = Field(default=None)
+    """Throughput stats json as written by `contrib/benchmark.py --save`, used
+    to rank engines per language pair"""
+
+    estimate_dedupe_limit: int = Field(default=1_000_000)
+    """Estimate: maximum number of distinct segments remembered for
+    de-duplication (about 100 MB), later duplicates are counted as segments"""
+
+    capabilities_uri: str = Field(
+        default=str(Path.home() / ".cache" / "ftm-translate" / "capabilities.json")
+    )
+    """Persisted index of the installed language pairs per engine (refresh with
+    `ftm-translate pairs --refresh`)"""
+
+    pivot_languages: list[str] = Field(default=["en"])
+    """Intermediate languages to translate through if an engine has no direct
+    model for a pair (empty to disable)"""
+
+    pivot_cache_uri: str | None = Field(default=None)
+    """Anystore uri to cache the pivot language text of the first hop, so that
+    translating into several target languages decodes the source only once
+    (default: bounded in-process cache of `pivot_cache_size` texts)"""
+
+    pivot_cache_size: int = Field(default=10_000)
+    """Pivot language texts kept in the in-process cache (0 to disable)"""
+
+    tiered: bool = Field(default=False)
+    """Worker: translate with `tier_fast_engine` first, then re-translate with
+    `tier_quality_engine` in a low priority backfill job"""
+
+    tier_fast_engine: Engine = Field(default="apertium")
+    """Engine for the fast first pass in tiered mode"""
+
+    tier_quality_engine: Engine = Field(default="argos")
+    """Engine for the quality backfill in tiered mode"""
+
+    worker_pairs: list[str] = Field(default=[])
+    """Language pairs (e.g. `de-en`) the worker loads before taking jobs"""
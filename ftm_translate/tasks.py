@@ -1,17 +1,26 @@
+from typing import Any, Iterable, Literal, TypeAlias
+
+from anystore.util import clean_dict
 from followthemoney.namespace import Namespace
 from followthemoney.proxy import EntityProxy
 from followthemoney.util import make_entity_id
 from ftmq.store.fragments import get_fragments
+from ftmq.store.fragments.dataset import Fragments
+from ftmq.store.fragments.loader import BulkLoader
 from openaleph_procrastinate import defer
 from openaleph_procrastinate.app import make_app
 from openaleph_procrastinate.model import DatasetJob
 from openaleph_procrastinate.settings import OpenAlephSettings
-from openaleph_procrastinate.tasks import task
+from openaleph_procrastinate.tasks import Priorities, task
+from procrastinate.exceptions import AlreadyEnqueued
 
 from ftm_translate.exceptions import ProcessingException
-from ftm_translate.logic.base import translate_entity
-from ftm_translate.settings import Settings
-from ftm_translate.util import dehydrate_entity
+from ftm_translate.logic.base import translate_record
+from ftm_translate.logic.budget import Budget
+from ftm_translate.logic.normalize import NormalizeStats
+from ftm_translate.logic.record import TextRecord
+from ftm_translate.settings import Engine, Settings
+from ftm_translate.util import PARTIAL_KEY, TIER_KEY, Tier
 
 settings = Settings()
 openaleph_settings = OpenAlephSettings()
@@ -27,6 +36,397 @@ ORIGIN = "ftm-translate"
 QUERY_LIMIT = 1000
 ORIGIN = "translate"
 
+# Page range fan-out of large Pages documents
+AGGREGATE_TASK = "ftm_translate.tasks.aggregate"
+FANOUT_PROBE = 64
+FANOUT_CONTEXT = ("page_range", "page_parts")
+TRANSLATION_PREFIX = "__translation__"
+
+# Two-tier translation: fast first pass, quality backfill
+TIER_ENGINES: dict[Tier, Engine] = {
+    "fast": settings.tier_fast_engine,
+    "quality": settings.tier_quality_engine,
+}
+
+# Re-translation of entities over budget without budget
+OVERFLOW_KEY = "budget_overflow"
+
+# Page discovery
+PAGE_BATCH_MIN = 8
+# consecutive empty batches that end an open page range
+PAGE_MISSES = 2
+PageIdVariant: TypeAlias = Literal["signed", "plain"]
+PAGE_ID_VARIANTS: tuple[PageIdVariant, ...] = ("signed", "plain")
+# learned Page ID variant per dataset
+_dataset_variants: dict[str, PageIdVariant] = {}
+
+
+def get_target_languages(job: DatasetJob) -> list[str]:
+    """Get the target languages of the job (default from settings)"""
+    return (
+        job.context.get("target_languages")
+        or settings.target_languages
+        or [settings.target_language]
+    )
+
+
+def make_fragment_name(target_lang: str) -> str:
+    """Fragment name of the translation into the target language"""
+    return f"translation_{target_lang}"
+
+
+def make_part_fragment(fragment_name: str, start: int | None = None) -> str:
+    """Fragment name for the parent `indexText` of a page range sub-job (or
+    the common prefix of all of them if `start` is omitted)"""
+    if start is None:
+        return f"{fragment_name}__pages_"
+    return f"{fragment_name}__pages_{start:08d}"
+
+
+def make_page_ids(
+    entity: EntityProxy,
+    pages: Iterable[int],
+    dataset: str,
+    ns: Namespace,
+    variants: Iterable[PageIdVariant] = PAGE_ID_VARIANTS,
+) -> dict[str, PageIdVariant]:
+    """Generate the signed IDs of the Page children of a Pages entity, mapped
+    to the ID variant they were generated with. We assume their IDs instead of
+    doing a json lookup for the parent property, which is way too expensive.
+    """
+    page_ids: dict[str, PageIdVariant] = {}
+    if entity.id is None:
+        return page_ids
+    for variant in variants:
+        if variant == "signed":
+            parent_id = entity.id
+        else:
+            # https://github.com/openaleph/ingest-file/issues/30
+            parent_id = entity.id.split(".")[0]
+        for page in pages:
+            # apply correct namespace
+            page_id = ns.sign(make_entity_id(parent_id, page, key_prefix=dataset))
+            if page_id is not None:
+                page_ids.setdefault(page_id, variant)
+    return page_ids
+
+
+def fetch_pages(
+    store: Fragments,
+    entity: EntityProxy,
+    pages: range,
+    dataset: str,
+    ns: Namespace,
+    fallback: bool = True,
+) -> list[dict[str, Any]]:
+    """Get the Page fragments (origin = "ingest") for the given page numbers,
+    in page order.
+
+    Once a Page is found, the ID variant in use is remembered for the dataset
+    and only this variant is queried subsequently. If `fallback` is set, the
+    other variants are tried if nothing is found with the learned one.
+    """
+    variant = _dataset_variants.get(dataset)
+    variants = PAGE_ID_VARIANTS if variant is None else (variant,)
+    page_ids = make_page_ids(entity, pages, dataset, ns, variants)
+    fragments = list(store.fragments(list(page_ids), "default"))
+    if not fragments and variant is not None and fallback:
+        others = tuple(v for v in PAGE_ID_VARIANTS if v != variant)
+        page_ids = make_page_ids(entity, pages, dataset, ns, others)
+        fragments = list(store.fragments(list(page_ids), "default"))
+    if fragments:
+        _dataset_variants[dataset] = page_ids[fragments[0]["id"]]
+    # keep the page order for the parent `indexText`
+    order = {page_id: ix for ix, page_id in enumerate(page_ids)}
+    return sorted(fragments, key=lambda f: order[f["id"]])
+
+
+def count_page_parts(
+    store: Fragments, entity: EntityProxy, dataset: str, ns: Namespace
+) -> int:
+    """Find out into how many sub-jobs of `settings.fanout_pages` pages a
+    document splits by probing the first Page ID of each page range. This is
+    only done once the first page range is found to be full, so the Page ID
+    variant of the document has been learned by `fetch_pages`."""
+    size = settings.fanout_pages
+    variant = _dataset_variants.get(dataset)
+    variants = PAGE_ID_VARIANTS if variant is None else (variant,)
+    parts = 1
+    while True:
+        n = parts + FANOUT_PROBE - 1
+        boundaries: dict[str, int] = {}
+        for part in range(parts, parts + FANOUT_PROBE):
+            for page_id in make_page_ids(
+                entity, [part * size + 1], dataset, ns, variants
+            ):
+                boundaries[page_id] = part
+        found = [boundaries[f["id"]] for f in store.fragments(list(boundaries))]
+        if not found:
+            return parts
+        last = max(found)
+        parts = last + 1
+        if last < n:
+            return parts
+
+
+def get_context(job: DatasetJob) -> dict[str, Any]:
+    """Job context without the page range fan-out keys"""
+    return {k: v for k, v in job.context.items() if k not in FANOUT_CONTEXT}
+
+
+def get_tier(job: DatasetJob) -> Tier | None:
+    """Get the translation tier of the job, if running in tiered mode"""
+    tier: Tier | None = job.context.get("tier")
+    if tier is None and settings.tiered:
+        return "fast"
+    return tier
+
+
+def make_parent(entity: EntityProxy, tier: Tier | None = None) -> EntityProxy:
+    """Make the Pages parent fragment, marked with the translation tier"""
+    data: dict[str, Any] = {"id": entity.id, "schema": "Pages"}
+    if tier is not None:
+        data[TIER_KEY] = tier
+    return EntityProxy.from_dict(data)
+
+
+def defer_low(job: DatasetJob, entities: list[EntityProxy], **context: Any) -> None:
+    """Defer a low priority translate job for the entities"""
+    ctx = get_context(job)
+    ctx.pop("priority", None)
+    ctx.update(context)
+    low = DatasetJob.from_entities(
+        dataset=job.dataset,
+        queue=defer.tasks.translate.queue,
+        task=defer.tasks.translate.task,
+        entities=entities,
+        dehydrate=True,
+        batch=job.batch,
+        **ctx,
+    )
+    low.defer(app, Priorities.LOW)
+
+
+def defer_backfill(job: DatasetJob, entities: list[EntityProxy]) -> None:
+    """Defer a low priority job to re-translate the entities of a fast tier
+    job with the quality engine, replacing the fast translation fragments."""
+    defer_low(job, entities, tier="quality")
+
+
+def defer_overflow(
+    job: DatasetJob,
+    entities: list[EntityProxy],
+    source_lang: str | None,
+    tier: Tier | None = None,
+) -> None:
+    """Defer a low priority job to translate the entities that were over
+    budget with the larger overflow budget, replacing their partial
+    translation fragments. The source language of the document is passed on
+    (if any, else the Page entities use their own `detectedLanguage`), and so
+    is the translation tier, which a job without `tier` context would resolve
+    to the fast tier in tiered mode."""
+    job.log.info(f"Deferring {len(entities)} entities over budget ...")
+    context: dict[str, Any] = {OVERFLOW_KEY: True}
+    if source_lang is not None:
+        context["source_language"] = source_lang
+    if tier is not None:
+        context["tier"] = tier
+    defer_low(job, entities, **context)
+
+
+def fan_out(job: DatasetJob, entity: EntityProxy, parts: int) -> None:
+    """Defer one translate job per page range of a large Pages document,
+    except for the first range, which the current job has translated. The
+    last range is open-ended: its first page may be missing, and the pages
+    after it are only found by paging through. It has no end in the job
+    context, as `None` values don't survive the job payload."""
+    size = settings.fanout_pages
+    job.log.info(
+        f"Splitting document into {parts} page range jobs ...", entity_id=entity.id
+    )
+    for n in range(1, parts):
+        page_range = [n * size + 1]
+        if n < parts - 1:
+            page_range.append((n + 1) * size)
+        sub_job = DatasetJob.from_entities(
+            dataset=job.dataset,
+            queue=defer.tasks.translate.queue,
+            task=defer.tasks.translate.task,
+            entities=[entity],
+            dehydrate=True,
+            batch=job.batch,
+            **get_context(job),
+            page_range=page_range,
+            page_parts=parts,
+        )
+        sub_job.defer(
+            app, defer.get_priority(job.context, defer.tasks.translate.get_priority())
+        )
+
+
+def get_page_parts(
+    store: Fragments, entity_id: str, fragment_name: str
+) -> list[dict[str, Any]]:
+    """Get the page range fragments of a parent entity, ordered by page"""
+    prefix = make_part_fragment(fragment_name)
+    parts = [
+        f
+        for f in store.fragments(entity_id, origin=ORIGIN, include_fragment=True)
+        if f["fragment"].startswith(prefix)
+    ]
+    return sorted(parts, key=lambda f: f["fragment"])
+
+
+def get_translated_text(
+    store: Fragments, entity_id: str, fragment_name: str
+) -> list[str]:
+    """Get the stored translated text of an entity, e.g. of the fast tier"""
+    texts: list[str] = []
+    for data in store.fragments(entity_id, fragment=fragment_name, origin=ORIGIN):
+        texts.extend(data.get("properties", {}).get("translatedText", []))
+    return texts
+
+
+def defer_aggregate(job: DatasetJob, entity: EntityProxy, parts: int) -> None:
+    """Defer the aggregation of a fanned out Pages document. The queueing lock
+    makes sure it is only enqueued once, even if several page range jobs
+    finish at the same time."""
+    agg_job = DatasetJob.from_entities(
+        dataset=job.dataset,
+        queue=defer.tasks.translate.queue,
+        task=AGGREGATE_TASK,
+        entities=[entity],
+        dehydrate=True,
+        batch=job.batch,
+        **get_context(job),
+        page_parts=parts,
+    )
+    data = clean_dict(agg_job.model_dump(mode="json"))
+    try:
+        app.configure_task(
+            name=AGGREGATE_TASK,
+            queue=agg_job.queue,
+            priority=defer.get_priority(
+                job.context, defer.tasks.translate.get_priority()
+            ),
+            queueing_lock=f"{AGGREGATE_TASK}:{job.dataset}:{entity.id}",
+        ).defer(**data)
+    except AlreadyEnqueued:
+        job.log.info("Aggregation already enqueued", entity_id=entity.id)
+
+
+def translate_pages(
+    job: DatasetJob,
+    store: Fragments,
+    bulk: BulkLoader,
+    entity: EntityProxy,
+    source_lang: str | None,
+    target_langs: list[str],
+    start: int = 1,
+    end: int | None = None,
+    engine: Engine = settings.engine,
+    tier: Tier | None = None,
+    budget: Budget | None = None,
+    stats: NormalizeStats | None = None,
+) -> tuple[dict[str, EntityProxy], list[EntityProxy], bool]:
+    """Translate the Page entities (children) of a Pages entity within the
+    page range `start` - `end` (inclusive, open if `None`) into the target
+    languages. The Page entities are fetched once for all targets, each
+    target's translation is written to its own fragment. Without
+    `source_lang`, each Page is translated from its own detected language (or
+    the configured default).
+
+    Open ranges and the first range of a document are fetched in small,
+    growing batches and end early once `PAGE_MISSES` batches in a row come
+    back empty, so that a small document needs only a few tiny queries.
+
+    Returns:
+        The parent fragments with the collected `indexText` per target
+        language, a translation fragment of each translated Page entity and
+        whether the range was paged through to its `end` (the document may
+        have more pages)
+    """
+    ftm_dataset = job.payload["context"]["ftmstore"]
+    ns = Namespace(job.context["namespace"])
+    parents = {t: make_parent(entity, tier) for t in target_langs}
+    pages: list[EntityProxy] = []
+    if end is None or start == 1:
+        # unknown document size: start small and grow the batches
+        batch_size = PAGE_BATCH_MIN
+    else:
+        batch_size = min(QUERY_LIMIT, end - start + 1)
+    current_page = start
+    misses = 0
+    while end is None or current_page <= end:
+        batch_end = current_page + batch_size
+        if end is not None:
+            batch_end = min(batch_end, end + 1)
+        # get at most QUERY_LIMIT Page entities from the store
+        fragments = fetch_pages(
+            store,
+            entity,
+            range(current_page, batch_end),
+            ftm_dataset,
+            ns,
+            fallback=current_page == start,
+        )
+        for fragment in fragments:
+            # no proxy for the Page itself, only for its translation fragments
+            record = TextRecord.from_data(fragment, stats)
+            lang = source_lang or record.language or settings.source_language
+            if lang is None:
+                job.log.error("No source language detected", entity_id=record.id)
+                continue
+            try:
+                translate_record(record, lang, target_langs, engine, budget)
+            except Exception as e:
+                job.log.error(f"Translation failed: {e}", entity_id=record.id)
+            translated: EntityProxy | None = None
+            for target_lang in target_langs:
+                fragment_name = make_fragment_name(target_lang)
+                texts = record.translations.get(target_lang)
+                if texts:
+                    # add translated Page to store
+                    translated = record.to_proxy(target_lang, tier)
+                    bulk.put(translated, fragment_name)
+                elif tier == "quality":
+                    # the parent text replaces the fast one: keep the fast
+                    # translation of the pages that failed this time
+                    texts = get_translated_text(store, record.id, fragment_name)
+                if texts:
+                    # store translated text in parent for full-text search
+                    parents[target_lang].add("indexText", texts)
+            if translated is not None:
+                pages.append(translated)
+
+        # stop once batches come back empty: a single empty batch may just be
+        # a gap of missing pages, the next (larger) batch looks beyond it
+        misses = 0 if fragments else misses + 1
+        if misses >= PAGE_MISSES:
+            return parents, pages, False
+        current_page = batch_end
+        batch_size = min(batch_size * 2, QUERY_LIMIT)
+    return parents, pages, True
+
+
+def log_normalize_stats(job: DatasetJob, stats: NormalizeStats) -> None:
+    """Log how much of the OCR text normalisation removed before translation"""
+    if stats.texts:
+        job.log.info(
+            "Normalized texts",
+            texts=stats.texts,
+            chars_in=stats.chars_in,
+            chars_out=stats.chars_out,
+            reduction=round(stats.reduction, 3),
+        )
+
+
+def make_index_text(parent: EntityProxy) -> EntityProxy:
+    """Signal the indexer that the parent `indexText` is translated text"""
+    index_text = "\n".join(parent.get("indexText"))
+    parent.set("indexText", f"{TRANSLATION_PREFIX} {index_text}")
+    return parent
+
 
 @task(
     app=app,
@@ -35,96 +435,238 @@ ORIGIN = "translate"
 )
 def translate(job: DatasetJob) -> None:
     to_defer: list[EntityProxy] = []
+    to_aggregate: list[tuple[EntityProxy, int]] = []
+    to_backfill: list[EntityProxy] = []
+    to_overflow: dict[str | None, list[EntityProxy]] = {}
     ftm_dataset = job.payload["context"]["ftmstore"]
     ns = Namespace(job.context["namespace"])
     ctx_source_language = job.payload["context"].get("source_language", None)
+    page_range = job.context.get("page_range")
+    tier = get_tier(job)
+    engine = TIER_ENGINES[tier] if tier is not None else settings.engine
+    is_overflow = bool(job.context.get(OVERFLOW_KEY))
+    budget = Budget.overflow() if is_overflow else Budget()
+    stats = NormalizeStats()
     store = get_fragments(
         ftm_dataset,
         origin="ingest",
         database_uri=openaleph_settings.fragments_uri,
         **sqlalchemy_pool,
     )
-    fragment_name = f"translation_{settings.target_language}"
+    target_langs = get_target_languages(job)
     with job.get_writer(origin=ORIGIN) as bulk:
         for entity in job.load_entities():
-            # abort early if source language isn't set
-            source_lang = ctx_source_language or entity.first("detectedLanguage") or settings.source_language
-            if source_lang is None:
-                raise ProcessingException("No source language detected.")
+            # Page entities may have a detected language of their own
+            source_lang = ctx_source_language or entity.first("detectedLanguage")
 
             if entity.schema.is_a("Pages"):
-                # We want to translate the Page entities (children). To look
-                # them up in the ftm store, we assume their IDs in batches
-                # instead of doing a json lookup for parent property which is
-                # way too expensive.
-                current_page = 1
-                parent = EntityProxy.from_dict({"id": entity.id, "schema": "Pages"})
-                while True:
-                    # generate Page entities IDs:
-                    page_batch = range(current_page, current_page + QUERY_LIMIT)
-                    page_ids = set(
-                        make_entity_id(entity.id, p, key_prefix=ftm_dataset)
-                        for p in page_batch
-                    )
-                    # https://github.com/openaleph/ingest-file/issues/30
-                    page_id_no_ns = set(
-                        make_entity_id(entity.id.split(".")[0], p, key_prefix=ftm_dataset)
-                        for p in page_batch
-                    )
-                    page_ids.update(page_id_no_ns)
-                    # apply correct namespace
-                    page_ids = list(map(ns.sign, page_ids))
-                    # get at most QUERY_LIMIT Page entities with
-                    # origin = "ingest" from the store
-                    pages_found = False
-                    ix = 1
-                    for ix, fragment in enumerate(  # noqa: B007
-                        store.fragments(page_ids, "default"), 1
-                    ):
-                        pages_found = True
-                        page = EntityProxy.from_dict(fragment)
-                        try:
-                            translated = translate_entity(page, source_lang)
-                            if translated.has("translatedText"):
-                                # add translated Page to store
-                                bulk.put(dehydrate_entity(translated), fragment_name)
-                                # store translated text in parent for full-text search
-                                parent.add(
-                                    "indexText", translated.get("translatedText")
-                                )
-                                # defer page entity to index stage
-                                to_defer.append(page)
-                        except Exception as e:
-                            job.log.error(f"Translation failed: {e}", entity_id=page.id)
-
-                    if pages_found:
-                        # signal the indexer that this is translated text:
-                        index_text = "\n".join(parent.get("indexText"))
-                        parent.set("indexText", f"__translation__ {index_text}")
-                        # write parent fragment to store
-                        bulk.put(parent, fragment=fragment_name)
-                        # defer parent entity to index stage
-                        to_defer.append(entity)
+                if page_range is not None:
+                    # page range sub-job of a large document
+                    start, end = page_range[0], None
+                    if len(page_range) > 1:
+                        end = page_range[1]
+                    parts = job.context["page_parts"]
+                else:
+                    # the first page range, if large documents are fanned out
+                    start, end, parts = 1, settings.fanout_pages or None, 1
+                parents, pages, full = translate_pages(
+                    job,
+                    store,
+                    bulk,
+                    entity,
+                    source_lang,
+                    target_langs,
+                    start,
+                    end,
+                    engine,
+                    tier,
+                    budget,
+                    stats,
+                )
+                if page_range is None and end is not None and full:
+                    # the first page range is full: look for further ranges
+                    parts = count_page_parts(store, entity, ftm_dataset, ns)
+                    if parts > 1:
+                        fan_out(job, entity, parts)
                     else:
-                        # there are no Page entities with origin = ingest
-                        job.log.error(
-                            "Translation failed. No ingest Page fragments found",
-                            entity_id=entity.id,
+                        # no further page range found: page through the rest
+                        more_parents, more_pages, _ = translate_pages(
+                            job,
+                            store,
+                            bulk,
+                            entity,
+                            source_lang,
+                            target_langs,
+                            end + 1,
+                            None,
+                            engine,
+                            tier,
+                            budget,
+                            stats,
                         )
+                        for target_lang, parent in more_parents.items():
+                            parents[target_lang].add(
+                                "indexText", parent.get("indexText")
+                            )
+                        pages.extend(more_pages)
+                to_overflow.setdefault(source_lang, []).extend(
+                    p for p in pages if p.context.get(PARTIAL_KEY)
+                )
 
-                    # stop if no more Page entities
-                    if ix <= QUERY_LIMIT:
-                        break
+                if parts > 1:
+                    # one page range of a large document, aggregated later
+                    for target_lang, parent in parents.items():
+                        fragment = make_part_fragment(
+                            make_fragment_name(target_lang), start
+                        )
+                        bulk.put(make_index_text(parent), fragment=fragment)
+                    to_defer.extend(pages)
+                    to_aggregate.append((entity, parts))
+                    continue
+
+                # the quality engine may translate what the fast engine couldn't
+                to_backfill.append(entity)
+                if pages:
+                    # write parent fragments to store
+                    for target_lang, parent in parents.items():
+                        if parent.has("indexText"):
+                            fragment = make_fragment_name(target_lang)
+                            bulk.put(make_index_text(parent), fragment=fragment)
+                    # defer page entities and parent entity to index stage
+                    to_defer.extend(pages)
+                    to_defer.append(entity)
+                else:
+                    # there are no Page entities with origin = ingest
+                    job.log.error(
+                        "Translation failed. No ingest Page fragments found",
+                        entity_id=entity.id,
+                    )
 
             else:
+                # abort early if source language isn't set
+                source_lang = source_lang or settings.source_language
+                if source_lang is None:
+                    raise ProcessingException("No source language detected.")
                 try:
                     # all other Documents, easy
-                    translated = translate_entity(entity, source_lang)
-                    if translated is not None:
-                        bulk.put(dehydrate_entity(translated), fragment_name)
-                        to_defer.append(translated)
+                    # only the texts are read, not a previous translation
+                    # (fast tier or partial) merged into the stored entity
+                    record = translate_record(
+                        TextRecord.from_proxy(entity, stats),
+                        source_lang,
+                        target_langs,
+                        engine,
+                        budget,
+                    )
+                    # an empty fragment would replace a previous translation
+                    translated = False
+                    for target_lang, texts in record.translations.items():
+                        if texts:
+                            fragment = make_fragment_name(target_lang)
+                            bulk.put(record.to_proxy(target_lang, tier), fragment)
+                            translated = True
+                    to_backfill.append(entity)
+                    if translated:
+                        to_defer.append(entity)
+                        if record.partial:
+                            to_overflow.setdefault(source_lang, []).append(entity)
                 except ProcessingException as e:
                     job.log.error(f"Translation failed: {e}", entity_id=entity.id)
 
+    log_normalize_stats(job, stats)
+
+    # the page range job that sees all parts written triggers the aggregation
+    for entity, parts in to_aggregate:
+        if entity.id is None:
+            continue
+        if all(
+            len(get_page_parts(store, entity.id, make_fragment_name(t))) >= parts
+            for t in target_langs
+        ):
+            defer_aggregate(job, entity, parts)
+
     if to_defer:
-        defer.index(app, job.dataset, to_defer, **job.context)
+        defer.index(app, job.dataset, to_defer, **get_context(job))
+
+    # fanned out documents are backfilled after their aggregation
+    if tier == "fast" and to_backfill and not is_overflow:
+        defer_backfill(job, to_backfill)
+
+    # pages over budget are re-translated as single entities (the parent
+    # `indexText` keeps their partial translation). In the fast tier, the
+    # backfill re-translates them and defers their overflow in the quality
+    # tier, so that no fast overflow job replaces a quality translation.
+    for source_lang, entities in to_overflow.items():
+        if not entities or tier == "fast":
+            continue
+        if is_overflow:
+            # no further round: the overflow budget is the last resort
+            job.log.warning(
+                f"{len(entities)} entities over the overflow budget, keeping "
+                "their partial translation"
+            )
+        elif settings.budget_overflow == "defer":
+            defer_overflow(job, entities, source_lang, tier)
+
+
+@task(
+    app=app,
+    retry=defer.tasks.translate.max_retries,
+    tracer_uri=openaleph_settings.redis_url,
+)
+def aggregate(job: DatasetJob) -> None:
+    """Assemble the parent `indexText` fragment of a Pages document that was
+    translated in page range sub-jobs and defer it to the index stage."""
+    to_defer: list[EntityProxy] = []
+    to_backfill: list[EntityProxy] = []
+    to_cleanup: list[tuple[str, str]] = []
+    tier = get_tier(job)
+    ftm_dataset = job.payload["context"]["ftmstore"]
+    store = get_fragments(
+        ftm_dataset,
+        origin="ingest",
+        database_uri=openaleph_settings.fragments_uri,
+        **sqlalchemy_pool,
+    )
+    target_langs = get_target_languages(job)
+    with job.get_writer(origin=ORIGIN) as bulk:
+        for entity in job.get_entities():
+            fragment_names = [make_fragment_name(t) for t in target_langs]
+            target_parts = {
+                f: get_page_parts(store, entity.id, f) for f in fragment_names
+            }
+            missing = [
+                f for f, p in target_parts.items() if len(p) < job.context["page_parts"]
+            ]
+            if missing:
+                job.log.warning(
+                    "Aggregation skipped. Page range jobs incomplete",
+                    entity_id=entity.id,
+                    fragments=missing,
+                    expected=job.context["page_parts"],
+                )
+                continue
+            for fragment_name, parts in target_parts.items():
+                index_text: list[str] = []
+                for part in parts:
+                    for text in part.get("properties", {}).get("indexText", []):
+                        text = text.removeprefix(TRANSLATION_PREFIX).strip()
+                        if text:
+                            index_text.append(text)
+                    to_cleanup.append((entity.id, part["fragment"]))
+                if index_text:
+                    parent = make_parent(entity, tier)
+                    parent.set("indexText", index_text)
+                    bulk.put(make_index_text(parent), fragment=fragment_name)
+            to_defer.append(entity)
+            to_backfill.append(entity)
+
+    # remove the page range fragments now covered by the parent fragment
+    for entity_id, fragment in to_cleanup:
+        store.delete(entity_id=entity_id, fragment=fragment, origin=ORIGIN)
+
+    if to_defer:
+        defer.index(app, job.dataset, to_defer, **get_context(job))
+
+    if tier == "fast" and to_backfill:
+        defer_backfill(job, to_backfill)
@@ -1,30 +1,22 @@
-from followthemoney import E, EntityProxy
-from ftmq.util import make_entity
+from typing import Literal, TypeAlias
+
+from followthemoney import EntityProxy
 from normality import stringify
 
+Tier: TypeAlias = Literal["fast", "quality"]
+TIER_KEY = "translation_tier"
+PARTIAL_KEY = "translation_partial"
+
 
-def get_lang_prop(entity: EntityProxy) -> str:
-    """Get ftm property for translated language based on schema"""
-    if entity.schema.name == "Page":
+def get_lang_prop(entity: EntityProxy | str) -> str:
+    """Get ftm property for translated language based on schema (or schema
+    name)"""
+    schema = entity if isinstance(entity, str) else entity.schema.name
+    if schema == "Page":
         return "translatedTextLanguage"
     return "translatedLanguage"
 
 
-def dehydrate_entity(entity: E) -> E:
-    """Make translation fragment"""
-    lang_prop = get_lang_prop(entity)
-    data = {
-        "id": entity.id,
-        "schema": entity.schema.name,
-        "caption": entity.caption,
-        "properties": {
-            "translatedText": entity.get("translatedText"),
-            lang_prop: entity.get(lang_prop),
-        },
-    }
-    return make_entity(data, entity.__class__)
-
-
 def filter_text(text):
     """Remove text strings not worth indexing for full-text search."""
     text = stringify(text)
@@ -0,0 +1,99 @@
+"""
+Worker for the `translate` queue that shares the model weights between jobs.
+
+A single process loads the translation engines and the configured language
+pairs once (package discovery, tokenizers, sentence splitters and the
+ctranslate2 decoder with its model weights) and then runs `concurrency` jobs
+at the same time in threads. The jobs of a language pair share one decoder:
+it is created with `inter_threads=concurrency`, so that it decodes that many
+batches in parallel (releasing the GIL), each with `cores / concurrency`
+intra-op threads. The memory for the weights is paid once per process, not
+once per concurrent job.
+
+Example:
+    ```bash
+    ftm-translate worker -c 8 -p de-en -p fr-en
+    ```
+"""
+
+import os
+from typing import Iterable
+
+from anystore.logging import get_logger
+
+from ftm_translate.logic.base import get_translator
+from ftm_translate.settings import Engine, Settings
+
+log = get_logger(__name__)
+
+settings = Settings()
+
+THREAD_ENV = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+
+def get_thread_budget(concurrency: int) -> int:
+    """Intra-op threads per concurrent job so that all jobs share the cores"""
+    return max(1, (os.cpu_count() or 1) // max(1, concurrency))
+
+
+def set_thread_budget(concurrency: int, threads: int) -> None:
+    """Configure the decoder to run `concurrency` batches in parallel with
+    `threads` intra-op threads each. This needs to happen before the first
+    decoder is loaded."""
+    for key in THREAD_ENV:
+        os.environ[key] = str(threads)
+    os.environ["ARGOS_INTRA_THREADS"] = str(threads)
+    os.environ["ARGOS_INTER_THREADS"] = str(concurrency)
+    try:
+        # argos reads its settings at import time
+        import argostranslate.settings
+
+        argostranslate.settings.intra_threads = threads
+        argostranslate.settings.inter_threads = concurrency
+    except ImportError:
+        pass
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def parse_pair(pair: str) -> tuple[str, str]:
+    """Parse a language pair like `de-en`"""
+    source_lang, _, target_lang = pair.partition("-")
+    if not source_lang or not target_lang:
+        raise ValueError(f"Invalid language pair: `{pair}`")
+    return source_lang, target_lang
+
+
+def preload(pairs: Iterable[str], engine: Engine = settings.engine) -> None:
+    """Load the translators for the given language pairs in this process"""
+    engines = settings.router_engines if engine == "auto" else [engine]
+    for pair in pairs:
+        source_lang, target_lang = parse_pair(pair)
+        for engine_ in engines:
+            try:
+                get_translator(source_lang, target_lang, engine_).preload()
+                log.info("Preloaded language pair.", pair=pair, engine=engine_)
+            except Exception as e:
+                log.error(f"Preloading failed: {e}", pair=pair, engine=engine_)
+
+
+def run_worker(
+    concurrency: int,
+    pairs: Iterable[str] = settings.worker_pairs,
+    engine: Engine = settings.engine,
+    threads: int | None = None,
+    queues: Iterable[str] = ("translate",),
+) -> None:
+    """Preload the language pairs and run `concurrency` jobs at the same time
+    in this process, until it receives SIGTERM or SIGINT"""
+    threads = threads or get_thread_budget(concurrency)
+    set_thread_budget(concurrency, threads)
+    preload(pairs, engine)
+    from ftm_translate.tasks import app
+
+    log.info("Starting worker.", concurrency=concurrency, threads=threads)
+    app.run_worker(queues=list(queues), concurrency=concurrency, name="translate")
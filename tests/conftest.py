@@ -0,0 +1,24 @@
+import os
+from tempfile import TemporaryDirectory
+
+import pytest
+
+# keep the capability index of the test runs out of the user's cache
+_capabilities = TemporaryDirectory()
+os.environ["FTM_TRANSLATE_CAPABILITIES_URI"] = os.path.join(
+    _capabilities.name, "capabilities.json"
+)
+
+
+def _translate_upper(texts: list[str], *args) -> list[str | None]:
+    return [t.upper() for t in texts]
+
+
+@pytest.fixture
+def translate_upper(monkeypatch):
+    """Translate entities by upper-casing their texts instead of using an
+    engine, returns the stand-in for tests that wrap it"""
+    from ftm_translate.logic import base
+
+    monkeypatch.setattr(base, "translate_batch", _translate_upper)
+    return _translate_upper
@@ -0,0 +1,136 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import argostranslate.package
+import argostranslate.translate
+import pytest
+
+from ftm_translate.logic import argos
+from ftm_translate.logic.argos import ArgosTranslator, get_packaged, translate_packaged
+
+
+class FakeTokenizer:
+    def encode(self, sentence):
+        return sentence.split()
+
+    def decode(self, tokens):
+        # like sentencepiece, with a leading space
+        return " " + " ".join(tokens)
+
+
+class FakeSentencizer:
+    def split_sentences(self, text):
+        return [s.strip() + "." for s in text.split(".") if s.strip()]
+
+
+class FakeDecoder:
+    def __init__(self):
+        self.calls = []
+
+    def translate_batch(self, tokenized, target_prefix=None, **kwargs):
+        self.calls.append(tokenized)
+        return [
+            SimpleNamespace(hypotheses=[[t.upper() for t in tokens]], scores=[0.0])
+            for tokens in tokenized
+        ]
+
+
+@pytest.fixture
+def installed(monkeypatch, tmp_path):
+    """Install a de-en package without a model and get its translation the
+    way argostranslate looks it up, with stand-ins for the tokenizer, sentence
+    splitter and decoder"""
+    package_path = tmp_path / "translate-de_en"
+    package_path.mkdir()
+    metadata = {"from_code": "de", "to_code": "en", "type": "translate"}
+    (package_path / "metadata.json").write_text(json.dumps(metadata))
+    monkeypatch.setattr(argostranslate.package.settings, "package_dirs", [tmp_path])
+    monkeypatch.setattr(argostranslate.translate, "installed_translates", [])
+    monkeypatch.setattr(argos, "has_pair", lambda *args: True)
+    argostranslate.translate.get_installed_languages.cache_clear()
+
+    languages = {
+        lang.code: lang for lang in argostranslate.translate.get_installed_languages()
+    }
+    translation = languages["de"].get_translation(languages["en"])
+    packaged = get_packaged(translation)
+    assert packaged is not None
+    packaged.pkg.tokenizer = FakeTokenizer()
+    packaged.sentencizer = FakeSentencizer()
+    packaged.translator = FakeDecoder()
+    yield translation
+    argostranslate.translate.get_installed_languages.cache_clear()
+
+
+def test_argos_translate_packaged(installed):
+    texts = [
+        "Ein Satz. Noch ein Satz.",
+        "Erste Zeile.\nZweite Zeile.",
+        "Kurz.",
+        "\nLeere Zeile.",
+    ]
+    # argostranslate wraps the package translation
+    assert isinstance(installed, argostranslate.translate.CachedTranslation)
+    packaged = get_packaged(installed)
+    translated = translate_packaged(packaged, texts)
+
+    # all sentences of all texts go to the decoder at once
+    assert len(packaged.translator.calls) == 1
+    assert len(packaged.translator.calls[0]) == 6
+
+    # same result as argostranslate translating text by text
+    expected = [installed.translate(text) for text in texts]
+    assert translated == expected
+    assert translated[1] == "ERSTE ZEILE.\nZWEITE ZEILE."
+    assert translate_packaged(packaged, []) == []
+
+
+def test_argos_translate_batch(installed):
+    decoder = get_packaged(installed).translator
+    translator = ArgosTranslator("de", "en")
+    translated = translator.translate_batch(["Ein Satz.", "Noch ein Satz."])
+    assert translated == ["EIN SATZ.", "NOCH EIN SATZ."]
+    assert len(decoder.calls) == 1
+
+
+def test_argos_translation_cached(installed, monkeypatch):
+    lookups = []
+    get_installed_languages = argostranslate.translate.get_installed_languages
+
+    def count_lookups():
+        lookups.append(1)
+        return get_installed_languages()
+
+    count_lookups.cache_clear = get_installed_languages.cache_clear
+    monkeypatch.setattr(
+        argostranslate.translate, "get_installed_languages", count_lookups
+    )
+    translator = ArgosTranslator("de", "en")
+    assert translator.translate("Ein Satz.") == "EIN SATZ."
+    assert translator.translate_batch(["Noch ein Satz."]) == ["NOCH EIN SATZ."]
+    assert translator.translate_batch(["Kurz."]) == ["KURZ."]
+    assert len(lookups) == 1
+
+
+def test_argos_shared_decoder(installed, monkeypatch):
+    decoders = []
+
+    def make_decoder(model_path, **kwargs):
+        decoders.append(kwargs)
+        return FakeDecoder()
+
+    monkeypatch.setattr(argostranslate.translate, "Translator", make_decoder)
+    monkeypatch.setattr(argos.argos_settings, "inter_threads", 4)
+    get_packaged(installed).translator = None
+
+    # the decoder is loaded before taking jobs and shared by concurrent jobs
+    translator = ArgosTranslator("de", "en")
+    translator.preload()
+    assert len(decoders) == 1
+    assert decoders[0]["inter_threads"] == 4
+    with ThreadPoolExecutor(4) as pool:
+        translated = list(pool.map(translator.translate_batch, [["Satz."]] * 8))
+    assert translated == [["SATZ."]] * 8
+    assert len(decoders) == 1
+    assert len(get_packaged(installed).translator.calls) == 8
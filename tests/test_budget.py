@@ -0,0 +1,23 @@
+from followthemoney import model as ftm_model
+from followthemoney.proxy import EntityProxy
+
+from ftm_translate.logic import base
+from ftm_translate.logic.budget import Budget, translate_within
+from ftm_translate.util import PARTIAL_KEY
+
+
+def test_budget(translate_upper):
+    segments = ["eins zwei", "drei vier fünf", "sechs"]
+    assert Budget.unlimited().truncate(segments) == (segments, False)
+    assert Budget(segments=2).truncate(segments) == (segments[:2], True)
+    assert Budget(chars=15).truncate(segments) == (["eins zwei", "drei"], True)
+
+    res = translate_within(segments, lambda t: [s.upper() for s in t], Budget(chars=9))
+    assert res.partial
+    assert res.results == ["EINS ZWEI", None, None]
+
+    entity = EntityProxy(ftm_model.get("Page"), {"id": "a"})
+    entity.add("bodyText", "Erster Absatz.\n\nZweiter Absatz.")
+    translated = base.translate_entity(entity, "de", budget=Budget(segments=1))
+    assert translated.get("translatedText") == ["ERSTER ABSATZ."]
+    assert translated.context[PARTIAL_KEY]
@@ -0,0 +1,57 @@
+from ftm_translate.logic import capabilities
+
+
+def test_capabilities(monkeypatch, tmp_path):
+    uri = str(tmp_path / "capabilities.json")
+    scanned = {"argos": ["de-en"], "apertium": ["es-ca", "ca-es"]}
+    monkeypatch.setattr(capabilities, "scan_engine", lambda e: scanned.get(e))
+    capabilities.load_index.cache_clear()
+
+    # built and persisted on first use
+    index = capabilities.load_index(uri)
+    assert index.has_pair("argos", "deu", "eng")
+    assert not index.has_pair("argos", "fr", "en")
+    assert index.has_pair("apertium", "spa", "cat")
+
+    # lookups don't scan again until refreshed
+    scanned["argos"] = ["de-en", "fr-en"]
+    assert not capabilities.load_index(uri).has_pair("argos", "fr", "en")
+    capabilities.refresh_index(uri)
+    assert capabilities.load_index(uri).has_pair("argos", "fr", "en")
+    capabilities.load_index.cache_clear()
+
+    assert capabilities.make_pair("oci_aran", "cat") == "oc-ca"
+
+
+def test_capabilities_rescan(monkeypatch, tmp_path):
+    uri = str(tmp_path / "capabilities.json")
+    scans = []
+    scanned: dict[str, list[str]] = {}
+
+    def scan_engine(engine):
+        scans.append(engine)
+        return scanned.get(engine)
+
+    monkeypatch.setattr(capabilities, "scan_engine", scan_engine)
+    capabilities.load_index.cache_clear()
+    capabilities.rescan_index.cache_clear()
+
+    # nothing installed yet, an empty index is persisted
+    assert not capabilities.has_pair("argos", "de", "en", uri)
+    assert capabilities.load_index(uri).engines == {}
+    assert len(scans) == 4
+
+    # a model installed later is found by the re-scan of a miss
+    scanned["argos"] = ["de-en"]
+    capabilities.rescan_index.cache_clear()
+    assert capabilities.has_pair("argos", "de", "en", uri)
+    assert len(scans) == 6
+    assert capabilities.load_index(uri).has_pair("argos", "de", "en")
+
+    # but only once per process
+    assert not capabilities.has_pair("argos", "fr", "en", uri)
+    assert not capabilities.has_pair("argos", "es", "en", uri)
+    assert len(scans) == 6
+
+    capabilities.load_index.cache_clear()
+    capabilities.rescan_index.cache_clear()
@@ -0,0 +1,41 @@
+from followthemoney import model as ftm_model
+from followthemoney.proxy import EntityProxy
+
+from ftm_translate import estimate
+
+
+def make_entity(id_: str, lang: str | None, *texts: str) -> EntityProxy:
+    entity = EntityProxy(ftm_model.get("PlainText"), {"id": id_})
+    entity.add("bodyText", texts)
+    entity.add("detectedLanguage", lang)
+    return entity
+
+
+def test_estimate(monkeypatch):
+    monkeypatch.setattr(estimate, "has_pair", lambda e, s, t: s == "de")
+    monkeypatch.setattr(
+        estimate, "get_throughput", lambda e, s, t: 10.0 if s == "de" else None
+    )
+    entities = [
+        make_entity("a", "deu", "Hallo Welt", "12345"),
+        make_entity("b", "deu", "Hallo Welt"),
+        make_entity("c", "fra", "Bonjour"),
+        make_entity("d", "eng", "Hello"),
+    ]
+    res = estimate.estimate(entities, target_lang="en", engine="argos", workers=2)
+    assert res.entities == 4
+    assert res.skipped == 1
+    de = res.pairs["de-en"]
+    assert (de.segments, de.duplicates, de.chars) == (1, 1, 10)
+    assert res.cpu_hours == 1 / 3600
+    assert res.wall_hours == 0.5 / 3600
+    assert res.missing == ["fr-en"]
+    report = res.make_report()
+    assert report["cpu_hours"] == res.cpu_hours
+    assert report["pairs"]["de-en"]["cpu_hours"] == de.cpu_hours
+
+    # once the de-duplication set is full, duplicates count as segments
+    monkeypatch.setattr(estimate.settings, "estimate_dedupe_limit", 0)
+    res = estimate.estimate(entities, target_lang="en", engine="argos")
+    de = res.pairs["de-en"]
+    assert (de.segments, de.duplicates, de.chars) == (2, 0, 20)
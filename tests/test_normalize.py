@@ -0,0 +1,77 @@
+from followthemoney import model as ftm_model
+from followthemoney.proxy import EntityProxy
+
+from ftm_translate.logic import base
+from ftm_translate.logic.normalize import NormalizeStats, normalize_text
+from ftm_translate.logic.record import TextRecord
+
+OCR_TEXT = """Der Ver-
+trag   wurde mit der Nord-
+Amerika GmbH
+geschlossen.
+
+-----------
+Seite 3 von 12
+
+Name | Betrag | Datum
+12.03.2024 ........
+\f- 4 -
+2.500,00"""
+
+
+def test_normalize_text():
+    stats = NormalizeStats()
+    text = normalize_text(OCR_TEXT, stats)
+    assert text.segments == [
+        "Der Vertrag wurde mit der Nord-Amerika GmbH geschlossen.",
+        "Name Betrag Datum 12.03.2024",
+    ]
+    assert text.restore(["The contract.", "Name Amount Date"]) == (
+        "The contract.\n\nName Amount Date\n\n2.500,00"
+    )
+    # the translated segments are kept if others fail
+    assert text.restore(["The contract.", None]) == "The contract.\n\n2.500,00"
+    assert text.restore([None, None]) is None
+    assert stats.texts == 1
+    assert stats.chars_out < stats.chars_in
+    assert 0 < stats.reduction < 1
+
+
+def test_normalize_page_numbers():
+    # bare numbers are page numbers only on the first or last line of a page
+    text = normalize_text("17\nUmsatz\n2023\n1500\n\n12\n\nEnde\n18\f3\nWeiter")
+    assert text.segments == ["Umsatz 2023 1500", "Ende", "Weiter"]
+    assert text.restore(["Sales 2023 1500", "End", "Next"]) == (
+        "Sales 2023 1500\n\n12\n\nEnd\n\nNext"
+    )
+    text = normalize_text("Seite 2\nText\n– 7 –\nPage 3 of 9\nS. 4")
+    assert text.segments == ["Text"]
+    # the stripped lines count as removed
+    stats = NormalizeStats()
+    normalize_text("Seite 3 von 12\n----------\nText hier\n- 4 -", stats)
+    assert (stats.chars_in, stats.chars_out) == (41, 9)
+
+
+def test_normalize_schemata():
+    text = "Seite 3\nDer Ver-\ntrag"
+    page = TextRecord.from_data(
+        {"id": "p", "schema": "Page", "properties": {"bodyText": [text]}}
+    )
+    assert page.segments == ["Der Vertrag"]
+    # no OCR text
+    doc = TextRecord.from_data(
+        {"id": "d", "schema": "PlainText", "properties": {"bodyText": [text]}}
+    )
+    assert doc.segments == [text]
+
+
+def test_normalize_entity(translate_upper):
+    entity = EntityProxy(ftm_model.get("Page"), {"id": "p1", "schema": "Page"})
+    entity.add("bodyText", OCR_TEXT)
+    entity = base.translate_entity(entity, "de", "en")
+    assert entity.get("translatedText") == [
+        "DER VERTRAG WURDE MIT DER NORD-AMERIKA GMBH GESCHLOSSEN.\n\n"
+        # followthemoney strips the form feed, so no page break here
+        "NAME BETRAG DATUM 12.03.2024 2.500,00"
+    ]
+    assert entity.get("translatedTextLanguage") == ["en"]
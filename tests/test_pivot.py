@@ -0,0 +1,73 @@
+from ftm_translate.logic import base, pivot
+
+
+class FakeTranslator:
+    engine = "argos"
+    ensure_pair = True
+
+    def __init__(self, source_lang, target_lang):
+        self.source_lang = source_lang
+        self.target_lang = target_lang
+        self.pair = f"{source_lang}-{target_lang}"
+        self.calls = 0
+
+    def translate_batch(self, texts):
+        self.calls += len(texts)
+        return [f"{t} [{self.pair}]" for t in texts]
+
+
+def clear_caches():
+    pivot.get_pivot.cache_clear()
+    pivot.get_cache.cache_clear()
+    pivot.make_cached.cache_clear()
+    pivot.make_translator.cache_clear()
+
+
+def test_pivot(monkeypatch):
+    installed = {"uk-en", "en-de", "en-fr"}
+    monkeypatch.setattr(pivot, "has_pair", lambda e, s, t: f"{s}-{t}" in installed)
+    clear_caches()
+    assert pivot.get_pivot("argos", "uk", "de") == "en"
+    assert pivot.get_pivot("argos", "uk", "en") is None
+    assert pivot.get_pivot("argos", "uk", "es") is None
+
+    translators = {}
+
+    def get_engine_translator(s, t, engine):
+        return translators.setdefault((s, t), FakeTranslator(s, t))
+
+    monkeypatch.setattr(base, "get_engine_translator", get_engine_translator)
+    to_de = base.get_translator("uk", "de", "argos")
+    to_fr = base.get_translator("uk", "fr", "argos")
+    assert isinstance(to_de, pivot.PivotTranslator)
+    assert to_de.translate_batch(["a", "b"]) == [
+        "a [uk-en] [en-de]",
+        "b [uk-en] [en-de]",
+    ]
+    assert to_fr.translate_batch(["a"]) == ["a [uk-en] [en-fr]"]
+    # the first hop is reused from the cache
+    assert translators[("uk", "en")].calls == 2
+
+    # and so is a direct translation into the pivot language
+    to_en = base.get_translator("uk", "en", "argos")
+    assert isinstance(to_en, pivot.CachedTranslator)
+    assert to_en.translate_batch(["b", "c"]) == ["b [uk-en]", "c [uk-en]"]
+    assert translators[("uk", "en")].calls == 3
+    assert to_fr.translate_batch(["c"]) == ["c [uk-en] [en-fr]"]
+    assert translators[("uk", "en")].calls == 3
+    clear_caches()
+
+
+def test_pivot_cache():
+    cache = pivot.LRUCache(2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    assert cache.get("a") == "1"
+    cache.put("c", "3")
+    # the least recently used entry is dropped
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("1", "3")
+
+    cache = pivot.LRUCache(0)
+    cache.put("a", "1")
+    assert cache.get("a") is None
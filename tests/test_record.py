@@ -0,0 +1,51 @@
+from followthemoney.proxy import EntityProxy
+
+from ftm_translate.logic import base
+from ftm_translate.logic.record import TextRecord
+from ftm_translate.util import PARTIAL_KEY, TIER_KEY
+
+
+def test_record(translate_upper):
+    fragment = {
+        "id": "p1",
+        "schema": "Page",
+        "properties": {
+            "bodyText": ["Erster Absatz.\n\nZweiter Absatz."],
+            "detectedLanguage": ["deu"],
+            "index": ["1"],
+        },
+    }
+    document = {
+        "id": "d1",
+        "schema": "PlainText",
+        "properties": {"fileName": ["brief.txt"], "bodyText": ["Hallo"]},
+    }
+    record = TextRecord.from_data(fragment)
+    assert record.language == "deu"
+    assert record.segments == ["Erster Absatz.", "Zweiter Absatz."]
+    assert not hasattr(record, "__dict__")
+    assert TextRecord.from_data(document).caption == "brief.txt"
+
+    base.translate_record(record, record.language, ["en", "fr"])
+    assert record.translations["fr"] == ["ERSTER ABSATZ.\n\nZWEITER ABSATZ."]
+    assert not record.partial
+
+    # the proxy is only made for the translation fragment
+    proxy = record.to_proxy("fr", tier="fast")
+    assert proxy.schema.name == "Page"
+    assert proxy.get("translatedTextLanguage") == ["fr"]
+    assert not proxy.has("bodyText")
+    assert proxy.context[TIER_KEY] == "fast"
+    assert PARTIAL_KEY not in proxy.context
+
+    # the translation fragment keeps the caption of the entity
+    translated = base.translate_record(TextRecord.from_data(document), "de", "en")
+    assert translated.to_proxy("en").to_dict()["caption"] == "brief.txt"
+    proxy = EntityProxy.from_dict(document)
+    assert TextRecord.from_proxy(proxy).caption == "brief.txt"
+
+    records = list(
+        base.translate_records(map(TextRecord.from_data, [fragment] * 3), "de", "en")
+    )
+    assert len(records) == 3
+    assert records[0].translations["en"] == record.translations["en"]
@@ -0,0 +1,46 @@
+import json
+
+from ftm_translate.exceptions import ProcessingException
+from ftm_translate.logic import router
+
+
+class FakeTranslator:
+    def __init__(self, engine, fail=False):
+        self.engine = engine
+        self.fail = fail
+
+    def translate_batch(self, texts):
+        if self.fail:
+            raise ProcessingException("broken")
+        return [f"{self.engine}:{t}" for t in texts]
+
+
+def test_router(monkeypatch, tmp_path):
+    stats = tmp_path / "throughput.json"
+    stats.write_text(json.dumps({"argos": {"de-en": {"full": 1000.0}}}))
+    monkeypatch.setattr(router.settings, "router_engines", ["apertium", "argos"])
+    monkeypatch.setattr(router.settings, "router_short_text", 20)
+    monkeypatch.setattr(router, "has_pair", lambda *args: True)
+    monkeypatch.setattr(
+        router, "load_throughput", lambda: json.loads(stats.read_text())
+    )
+
+    # ranked by throughput, short texts go to the short engine first
+    assert router.get_route("de", "en", 100) == ["argos", "apertium"]
+    assert router.get_route("de", "en", 5) == ["argos", "apertium"]
+    monkeypatch.setattr(router.settings, "router_short_engine", "apertium")
+    assert router.get_route("de", "en", 5) == ["apertium", "argos"]
+    # no stats for pair: configured order
+    assert router.get_route("fr", "en", 100) == ["apertium", "argos"]
+
+    # fallback to next engine on failure
+    translators = {
+        "argos": FakeTranslator("argos", fail=True),
+        "apertium": FakeTranslator("apertium"),
+    }
+    monkeypatch.setattr(
+        router, "get_translator", lambda s, t, engine: translators[engine]
+    )
+    assert router.translate_batch_routed(["x" * 50], "de", "en") == [
+        "apertium:" + "x" * 50
+    ]
@@ -0,0 +1,28 @@
+from ftm_translate.logic.scheduler import BucketScheduler
+
+
+def test_scheduler_order_and_buckets():
+    batches = []
+
+    def translate_batch(texts):
+        batches.append(texts)
+        return [t.upper() for t in texts]
+
+    scheduler = BucketScheduler(translate_batch, batch_size=2, buckets=[5, 50])
+    items = [
+        ("a", ["short", "x" * 40]),
+        ("b", ["tiny"]),
+        ("c", []),
+        ("d", ["y" * 30, "z" * 100]),
+    ]
+    results = list(scheduler.map(items))
+    assert [key for key, _ in results] == ["a", "b", "c", "d"]
+    assert results[0][1] == ["SHORT", "X" * 40]
+    assert results[1][1] == ["TINY"]
+    assert results[2][1] == []
+    assert results[3][1] == ["Y" * 30, "Z" * 100]
+    # segments are grouped by length
+    assert ["short", "tiny"] in batches
+    assert ["x" * 40, "y" * 30] in batches
+    assert scheduler.stats.segments == 5
+    assert scheduler.stats.padding_efficiency < 1
@@ -0,0 +1,60 @@
+import subprocess
+import sys
+
+from ftm_translate.logic import stream
+
+
+def test_stream(monkeypatch):
+    lines = [
+        "\n",
+        "Erster Absatz\n",
+        "zweite Zeile\n",
+        "\n",
+        "\n",
+        "Zweiter\n",
+        "\n",
+        "Ende",
+    ]
+    assert list(stream.iter_chunks(lines)) == [
+        ("", "\n"),
+        ("Erster Absatz\nzweite Zeile", "\n\n\n"),
+        ("Zweiter", "\n\n"),
+        ("Ende", ""),
+    ]
+    # long paragraphs are split at line breaks
+    assert list(stream.iter_chunks(["aaaa\n", "bbbb\n"], max_chars=6)) == [
+        ("aaaa", "\n"),
+        ("bbbb", "\n"),
+    ]
+
+    def translate_batch(texts, *args):
+        return [None if t == "Ende" else t.upper() for t in texts]
+
+    monkeypatch.setattr(stream, "translate_batch", translate_batch)
+    for workers in (1, 3):
+        res = stream.translate_stream(lines, "de", batch_size=1, workers=workers)
+        # the chunk that couldn't be translated is kept as it is
+        assert "".join(res) == "\nERSTER ABSATZ\nZWEITE ZEILE\n\n\nZWEITER\n\nEnde"
+
+
+# the CLI with the engine stubbed, reading from a pipe (not seekable, unlike
+# the stdin of typer's test runner)
+CLI = """
+from ftm_translate.cli import cli
+from ftm_translate.logic import stream
+
+stream.translate_batch = lambda texts, *args: [t.upper() for t in texts]
+cli(["text", "-s", "de"])
+"""
+
+
+def test_stream_cli():
+    res = subprocess.run(
+        [sys.executable, "-c", CLI],
+        input="Hallo Welt\nzweite\n\nDritter Absatz\n",
+        capture_output=True,
+        text=True,
+    )
+    assert res.returncode == 0, res.stderr
+    # line breaks and paragraphs of stdin are kept
+    assert res.stdout == "HALLO WELT\nZWEITE\n\nDRITTER ABSATZ\n"
@@ -0,0 +1,36 @@
+from followthemoney import model as ftm_model
+from followthemoney.proxy import EntityProxy
+
+from ftm_translate.logic import base
+
+
+def make_entity(entity_id: str | None) -> EntityProxy:
+    entity = EntityProxy(ftm_model.get("PlainText"), {"id": entity_id})
+    entity.add("bodyText", "Erster Absatz.\n\nZweiter Absatz.")
+    return entity
+
+
+def test_targets(monkeypatch):
+    calls = []
+
+    def translate_batch(texts, source_lang, target_lang, *args):
+        calls.append(target_lang)
+        return [f"{t} [{target_lang}]" for t in texts]
+
+    monkeypatch.setattr(base, "translate_batch", translate_batch)
+
+    translated = base.translate_entity(make_entity("a"), "de", ["en", "fr", "deu"])
+    # no OCR text, translated as it is
+    assert translated.get("translatedText") == [
+        "Erster Absatz.\n\nZweiter Absatz. [en]",
+        "Erster Absatz.\n\nZweiter Absatz. [fr]",
+    ]
+    assert set(translated.get("translatedLanguage")) == {"eng", "fra"}
+    assert calls == ["en", "fr"]
+
+    # entities that can't be translated are skipped
+    entities = [make_entity("c"), make_entity(None), make_entity("d")]
+    entities = list(base.translate_entities(entities, "de", ["en", "fr"]))
+    assert [e.id for e in entities] == ["c", "d"]
+    for entity in entities:
+        assert set(entity.get("translatedLanguage")) == {"eng", "fra"}
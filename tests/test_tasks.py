@@ -0,0 +1,343 @@
+import os
+import tempfile
+
+# local stand-ins, needs to be set before importing the tasks
+os.environ["FTM_FRAGMENTS_URI"] = (
+    f"sqlite:///{tempfile.mkdtemp(prefix='ftm-translate-test-')}/fragments.db"
+)
+os.environ["PROCRASTINATE_DB_URI"] = "memory://"
+os.environ["REDIS_URL"] = "memory://"
+
+from followthemoney.namespace import Namespace  # noqa: E402
+from followthemoney.proxy import EntityProxy  # noqa: E402
+from followthemoney.util import make_entity_id  # noqa: E402
+from ftmq.store.fragments import get_fragments  # noqa: E402
+from openaleph_procrastinate.model import DatasetJob  # noqa: E402
+
+from ftm_translate import tasks  # noqa: E402
+from ftm_translate.logic import base, budget  # noqa: E402
+
+DATASET = "test_tasks"
+NS = Namespace(DATASET)
+
+
+def make_doc(
+    name: str,
+    pages: list[int],
+    variant: str = "signed",
+    texts: dict[int, str] | None = None,
+    language: str | None = None,
+    page_language: str | None = None,
+) -> EntityProxy:
+    """Write a Pages document with the given Page numbers (and optional texts
+    per page) to the ingest store"""
+    texts = texts or {}
+    store = get_fragments(
+        DATASET, origin="ingest", database_uri=os.environ["FTM_FRAGMENTS_URI"]
+    )
+    bulk = store.bulk()
+    doc = EntityProxy.from_dict({"id": NS.sign(name), "schema": "Pages"})
+    doc.add("fileName", f"{name}.pdf")
+    doc.add("detectedLanguage", language)
+    parent_id = doc.id if variant == "signed" else doc.id.split(".")[0]
+    for page in pages:
+        page_id = NS.sign(make_entity_id(parent_id, page, key_prefix=DATASET))
+        entity = EntityProxy.from_dict({"id": page_id, "schema": "Page"})
+        entity.add("document", doc.id)
+        entity.add("index", page)
+        entity.add("bodyText", texts.get(page, f"Inhalt {page:02d}"))
+        entity.add("detectedLanguage", page_language)
+        bulk.put(entity, "default")
+    bulk.put(doc, "default")
+    bulk.flush()
+    return doc
+
+
+def make_text(name: str, text: str) -> EntityProxy:
+    """Write a PlainText document to the ingest store"""
+    store = get_fragments(
+        DATASET, origin="ingest", database_uri=os.environ["FTM_FRAGMENTS_URI"]
+    )
+    bulk = store.bulk()
+    doc = EntityProxy.from_dict({"id": NS.sign(name), "schema": "PlainText"})
+    doc.add("bodyText", text)
+    bulk.put(doc, "default")
+    bulk.flush()
+    return doc
+
+
+def run_translate(
+    monkeypatch,
+    *entities: EntityProxy,
+    translate_batch=None,
+    source_language: str | None = "de",
+) -> list[str]:
+    """Run a translate job for the entities until the queue is drained (with
+    the given engine stand-in, or the one already patched), returning the ids
+    of the entities deferred to the index stage"""
+    indexed: list[str] = []
+
+    def index(app, dataset, entities, **context) -> None:
+        indexed.extend(e.id for e in entities)
+
+    monkeypatch.setattr(tasks.defer, "index", index)
+    if translate_batch is not None:
+        monkeypatch.setattr(base, "translate_batch", translate_batch)
+    # the in-memory queue is bound to the event loop of the previous worker run
+    tasks.app.connector.reset()
+    context = {"ftmstore": DATASET, "namespace": DATASET}
+    if source_language is not None:
+        context["source_language"] = source_language
+    DatasetJob.from_entities(
+        dataset=DATASET,
+        queue="translate",
+        task="ftm_translate.tasks.translate",
+        entities=entities,
+        dehydrate=True,
+        **context,
+    ).defer(tasks.app)
+    tasks.app.run_worker(queues=["translate"], wait=False)
+    return indexed
+
+
+def get_translations(entity_id: str) -> dict[str, dict]:
+    """Get the translation fragments of an entity by fragment name"""
+    store = get_fragments(
+        DATASET, origin=tasks.ORIGIN, database_uri=os.environ["FTM_FRAGMENTS_URI"]
+    )
+    return {
+        f["fragment"]: f
+        for f in store.fragments(entity_id, origin=tasks.ORIGIN, include_fragment=True)
+    }
+
+
+def test_tasks_fan_out(monkeypatch, translate_upper):
+    monkeypatch.setattr(tasks.settings, "fanout_pages", 5)
+    doc = make_doc("fanout", list(range(1, 13)))
+
+    indexed = run_translate(monkeypatch, doc)
+
+    # all parts are merged into the parent fragment, in page order
+    fragments = get_translations(doc.id)
+    assert list(fragments) == ["translation_en"]
+    index_text = fragments["translation_en"]["properties"]["indexText"]
+    expected = "\n".join(f"INHALT {page:02d}" for page in range(1, 13))
+    assert index_text == [f"{tasks.TRANSLATION_PREFIX} {expected}"]
+    assert indexed.count(doc.id) == 1
+    assert len(indexed) == 13
+
+
+def test_tasks_fan_out_last(monkeypatch, translate_upper):
+    monkeypatch.setattr(tasks.settings, "fanout_pages", 5)
+    # the first page of the last range is missing
+    pages = [page for page in range(1, 15) if page != 11]
+    doc = make_doc("fanout-last", pages)
+
+    indexed = run_translate(monkeypatch, doc)
+
+    index_text = get_translations(doc.id)["translation_en"]["properties"]["indexText"]
+    expected = "\n".join(f"INHALT {page:02d}" for page in pages)
+    assert index_text == [f"{tasks.TRANSLATION_PREFIX} {expected}"]
+    assert len(indexed) == len(pages) + 1
+
+
+def test_tasks_pages_gap(monkeypatch, translate_upper):
+    monkeypatch.setattr(tasks.settings, "fanout_pages", 0)
+    # page 3 is missing, and pages 9 - 24 (a whole batch)
+    pages = [page for page in range(1, 41) if page != 3 and not 9 <= page <= 24]
+    doc = make_doc("gap", pages)
+
+    indexed = run_translate(monkeypatch, doc)
+
+    index_text = get_translations(doc.id)["translation_en"]["properties"]["indexText"]
+    expected = "\n".join(f"INHALT {page:02d}" for page in pages)
+    assert index_text == [f"{tasks.TRANSLATION_PREFIX} {expected}"]
+    assert len(indexed) == len(pages) + 1
+
+
+def test_tasks_pages_language(monkeypatch, translate_upper):
+    monkeypatch.setattr(tasks.settings, "fanout_pages", 0)
+    languages: list[str] = []
+
+    def translate_batch(texts, source_lang, *args):
+        languages.append(source_lang)
+        return translate_upper(texts)
+
+    # only the pages have a detected language
+    doc = make_doc("page-language", [1, 2], page_language="fra")
+
+    indexed = run_translate(
+        monkeypatch, doc, translate_batch=translate_batch, source_language=None
+    )
+
+    assert set(languages) == {"fra"}
+    assert len(indexed) == 3
+
+
+def test_tasks_pages_small(monkeypatch, translate_upper):
+    monkeypatch.setattr(tasks.settings, "fanout_pages", 250)
+    fetched: list[range] = []
+    fetch_pages = tasks.fetch_pages
+
+    def fetch(store, entity, pages, *args, **kwargs):
+        fetched.append(pages)
+        return fetch_pages(store, entity, pages, *args, **kwargs)
+
+    def count(*args):
+        raise AssertionError("Small documents aren't probed for page ranges")
+
+    monkeypatch.setattr(tasks, "fetch_pages", fetch)
+    monkeypatch.setattr(tasks, "count_page_parts", count)
+    doc = make_doc("small", [1, 2, 3])
+
+    indexed = run_translate(monkeypatch, doc)
+
+    assert fetched == [range(1, 9), range(9, 25), range(25, 57)]
+    assert len(indexed) == 4
+
+
+def test_tasks_pages_variant(monkeypatch, translate_upper):
+    monkeypatch.setattr(tasks.settings, "fanout_pages", 5)
+    # the dataset has learned the signed variant, but this document's pages
+    # use the plain parent ID
+    monkeypatch.setitem(tasks._dataset_variants, DATASET, "signed")
+    doc = make_doc("variant", list(range(1, 13)), variant="plain")
+
+    indexed = run_translate(monkeypatch, doc)
+
+    fragments = get_translations(doc.id)
+    assert list(fragments) == ["translation_en"]
+    index_text = fragments["translation_en"]["properties"]["indexText"]
+    expected = "\n".join(f"INHALT {page:02d}" for page in range(1, 13))
+    assert index_text == [f"{tasks.TRANSLATION_PREFIX} {expected}"]
+    assert len(indexed) == 13
+
+
+def translate_tiered(texts, source_lang, target_lang, engine):
+    """Fast and quality tier stand-ins, failing on `kaputt` (quality tier),
+    `selten` (fast tier) and `leer` (both tiers)"""
+    results: list[str | None] = []
+    for text in texts:
+        failing = "kaputt" if engine == "argos" else "selten"
+        if "leer" in text or failing in text:
+            results.append(None)
+        else:
+            prefix = "Q" if engine == "argos" else "F"
+            results.append(f"{prefix}:{text.upper()}")
+    return results
+
+
+def test_tasks_backfill(monkeypatch):
+    monkeypatch.setattr(tasks.settings, "tiered", True)
+    monkeypatch.setattr(tasks.settings, "fanout_pages", 0)
+    seen: list[tuple[str, str]] = []
+
+    def translate_batch(texts, source_lang, target_lang, engine):
+        seen.extend((engine, t) for t in texts)
+        return translate_tiered(texts, source_lang, target_lang, engine)
+
+    good = make_text("backfill-good", "Hallo Welt")
+    failed = make_text("backfill-failed", "kaputt")
+    empty = make_text("backfill-empty", "leer")
+    doc = make_doc("backfill-pages", [1, 2, 3], texts={2: "kaputt"})
+
+    run_translate(
+        monkeypatch, good, failed, empty, doc, translate_batch=translate_batch
+    )
+
+    # the quality translation replaces the fast one instead of being merged
+    props = get_translations(good.id)["translation_en"]["properties"]
+    assert props["translatedText"] == ["Q:HALLO WELT"]
+    # a failed quality pass keeps the fast translation
+    props = get_translations(failed.id)["translation_en"]["properties"]
+    assert props["translatedText"] == ["F:KAPUTT"]
+    # the quality engine may translate what the fast engine couldn't
+    assert ("argos", "leer") in seen
+    assert get_translations(empty.id) == {}
+    # the parent text keeps the fast translation of the failed page
+    props = get_translations(doc.id)["translation_en"]["properties"]
+    expected = "\n".join(["Q:INHALT 01", "F:KAPUTT", "Q:INHALT 03"])
+    assert props["indexText"] == [f"{tasks.TRANSLATION_PREFIX} {expected}"]
+
+
+def test_tasks_backfill_untranslated(monkeypatch):
+    monkeypatch.setattr(tasks.settings, "tiered", True)
+    monkeypatch.setattr(tasks.settings, "fanout_pages", 0)
+    rare = make_text("backfill-rare", "selten")
+    doc = make_doc("backfill-rare-pages", [1], texts={1: "selten"})
+
+    run_translate(monkeypatch, rare, doc, translate_batch=translate_tiered)
+
+    # entities the fast engine couldn't translate get the quality translation
+    props = get_translations(rare.id)["translation_en"]["properties"]
+    assert props["translatedText"] == ["Q:SELTEN"]
+    props = get_translations(doc.id)["translation_en"]["properties"]
+    assert props["indexText"] == [f"{tasks.TRANSLATION_PREFIX} Q:SELTEN"]
+
+
+class SmallBudget(budget.Budget):
+    chars: int = 20
+
+
+def test_tasks_overflow(monkeypatch, translate_upper):
+    monkeypatch.setattr(tasks.settings, "fanout_pages", 0)
+    monkeypatch.setattr(tasks.settings, "budget_overflow", "defer")
+    monkeypatch.setattr(budget.settings, "budget_chars", 20)
+    monkeypatch.setattr(budget.settings, "budget_overflow_factor", 2)
+    monkeypatch.setattr(tasks, "Budget", SmallBudget)
+    texts = {
+        # over the budget, within the overflow budget
+        2: "Erster Absatz.\n\nZweiter Absatz.",
+        # over the overflow budget as well
+        3: "Eins zwei drei.\n\nVier fünf sechs.\n\nSieben acht neun.",
+    }
+    doc = make_doc("overflow", [1, 2, 3], texts=texts, language="deu")
+
+    # the source language is only known from the document
+    run_translate(monkeypatch, doc, source_language=None)
+
+    store = get_fragments(
+        DATASET, origin="ingest", database_uri=os.environ["FTM_FRAGMENTS_URI"]
+    )
+    pages = {
+        f["properties"]["index"][0]: f["id"]
+        for f in tasks.fetch_pages(store, doc, range(1, 4), DATASET, NS)
+    }
+    translated = {
+        index: get_translations(page_id)["translation_en"]
+        for index, page_id in pages.items()
+    }
+    assert translated["2"]["properties"]["translatedText"] == [
+        "ERSTER ABSATZ.\n\nZWEITER ABSATZ."
+    ]
+    assert tasks.PARTIAL_KEY not in translated["2"]
+    assert translated["3"]["properties"]["translatedText"] == [
+        "EINS ZWEI DREI.\n\nVIER FÜNF SECHS.\n\nSIEBEN"
+    ]
+    assert translated["3"][tasks.PARTIAL_KEY]
+
+
+def test_tasks_overflow_tiered(monkeypatch):
+    monkeypatch.setattr(tasks.settings, "tiered", True)
+    monkeypatch.setattr(tasks.settings, "budget_overflow", "defer")
+    monkeypatch.setattr(budget.settings, "budget_chars", 20)
+    monkeypatch.setattr(budget.settings, "budget_overflow_factor", 2)
+    monkeypatch.setattr(tasks, "Budget", SmallBudget)
+    engines: list[str] = []
+
+    def translate_batch(texts, source_lang, target_lang, engine):
+        engines.append(engine)
+        return translate_tiered(texts, source_lang, target_lang, engine)
+
+    doc = make_text("overflow-tiered", "Erster Absatz. Zweiter Absatz.")
+    run_translate(monkeypatch, doc, translate_batch=translate_batch)
+
+    # the overflow is only deferred by the quality backfill, the fast tier
+    # doesn't translate the entity again
+    assert engines == ["apertium", "argos", "argos"]
+    translated = get_translations(doc.id)["translation_en"]
+    assert translated[tasks.TIER_KEY] == "quality"
+    assert translated["properties"]["translatedText"] == [
+        "Q:ERSTER ABSATZ. ZWEITER ABSATZ."
+    ]
+    assert tasks.PARTIAL_KEY not in translated
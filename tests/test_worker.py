@@ -0,0 +1,45 @@
+import os
+
+import argostranslate.settings
+import torch
+
+from ftm_translate import tasks, worker
+
+loaded = []
+
+
+class FakeTranslator:
+    def __init__(self, pair):
+        self.pair = pair
+
+    def preload(self):
+        loaded.append(self.pair)
+
+
+def test_worker(monkeypatch):
+    for key in (*worker.THREAD_ENV, "ARGOS_INTRA_THREADS", "ARGOS_INTER_THREADS"):
+        monkeypatch.setenv(key, "")
+    monkeypatch.setattr(argostranslate.settings, "inter_threads", 1)
+    monkeypatch.setattr(argostranslate.settings, "intra_threads", 0)
+    monkeypatch.setattr(
+        worker, "get_translator", lambda s, t, engine: FakeTranslator(f"{s}-{t}")
+    )
+    runs = []
+    monkeypatch.setattr(tasks.app, "run_worker", lambda **kwargs: runs.append(kwargs))
+    num_threads = torch.get_num_threads()
+    loaded.clear()
+
+    try:
+        worker.run_worker(4, ["de-en", "fr-en"], "argos", threads=2)
+    finally:
+        torch.set_num_threads(num_threads)
+
+    # the pairs are loaded before the jobs run concurrently in this process
+    assert loaded == ["de-en", "fr-en"]
+    assert runs == [{"queues": ["translate"], "concurrency": 4, "name": "translate"}]
+    # one decoder per pair runs the concurrent batches in parallel
+    assert argostranslate.settings.inter_threads == 4
+    assert argostranslate.settings.intra_threads == 2
+    assert os.environ["ARGOS_INTER_THREADS"] == "4"
+    assert os.environ["OMP_NUM_THREADS"] == "2"
+    assert isinstance(worker.get_thread_budget(2), int)